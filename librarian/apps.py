@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class LibrarianConfig(AppConfig):
     name = 'librarian'
+
+    def ready(self):
+        from . import signals  # noqa: F401
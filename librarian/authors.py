@@ -0,0 +1,86 @@
+''' Keeps Author rows and Book.authors links in sync
+    with comma separated Book.author strings.
+'''
+from django.db.models import Max
+from librarian.models import Author, Book
+
+CHUNK = 500
+
+
+def chunks(values):
+    values = list(values)
+    for start in range(0, len(values), CHUNK):
+        yield values[start:start + CHUNK]
+
+
+def authors_get_ids(names):
+    ''' Return Dict of casefolded name: Author id, creates missing authors.
+
+        Keyword argument:
+        names -- set of author names
+    '''
+    ids = {}
+    for chunk in chunks(names):
+        for name, id in Author.objects.filter(
+                name__in=chunk).values_list('name', 'id'):
+            ids[name.casefold()] = id
+
+    missing = [name for name in names if name.casefold() not in ids]
+    if missing:
+        Author.objects.bulk_create(
+            [Author(name=name) for name in missing], ignore_conflicts=True)
+        for chunk in chunks(missing):
+            for name, id in Author.objects.filter(
+                    name__in=chunk).values_list('name', 'id'):
+                ids[name.casefold()] = id
+    return ids
+
+
+def books_resolve_ids(books):
+    ''' Set pk of bulk created books on databases which do not return it,
+        matching them by unique isbn13, or by isbn and title without it.
+    '''
+    missing = [book for book in books if book.pk is None and book.isbn13]
+    for chunk in chunks(missing):
+        ids = dict(Book.objects.filter(
+            isbn13__in=[book.isbn13 for book in chunk]).values_list(
+            'isbn13', 'id'))
+        for book in chunk:
+            book.pk = ids.get(book.isbn13)
+
+    missing = [book for book in books if book.pk is None]
+    for chunk in chunks(missing):
+        ids = Book.objects.filter(
+            isbn__in={book.isbn for book in chunk}).values(
+            'isbn', 'title').annotate(id=Max('id'))
+        ids = {(row['isbn'], row['title']): row['id'] for row in ids}
+        for book in chunk:
+            book.pk = ids.get((book.isbn, book.title))
+
+
+def books_link_authors(books):
+    ''' Replace authors of provided saved books with names
+        parsed from their author strings.
+
+        Keyword argument:
+        books -- List of saved Book instances
+    '''
+    books_resolve_ids(books)
+    books = [book for book in books if book.pk is not None]
+    if not books:
+        return
+
+    names = {name for book in books for name in book.author_names()}
+    ids = authors_get_ids(names)
+
+    through = Book.authors.through
+    for chunk in chunks(book.pk for book in books):
+        through.objects.filter(book_id__in=chunk).delete()
+    links = {
+        (book.pk, ids[name.casefold()])
+        for book in books for name in book.author_names()
+        if name.casefold() in ids}
+    through.objects.bulk_create(
+        [through(book_id=book_id, author_id=author_id)
+         for book_id, author_id in links],
+        batch_size=CHUNK, ignore_conflicts=True)
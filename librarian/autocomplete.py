@@ -0,0 +1,189 @@
+''' In-memory prefix indexes of author names and distinct titles.
+    Built lazily from database, kept current by Book signals
+    and rebuilt after LIBRARIAN_AUTOCOMPLETE_MAX_AGE seconds to pick up
+    changes made by other processes. Rebuild runs in background thread,
+    stale indexes are served meanwhile.
+'''
+from bisect import bisect_left, insort
+import threading
+import time
+from django.db import connections
+from django.db.models import Count
+from librarian.conf import setting
+from librarian.models import Author, Book, split_authors
+
+FIELDS = ('author', 'title')
+
+
+class PrefixIndex:
+    ''' Sorted list of distinct values with reference counts.
+        Lookup costs one bisect plus number of returned values.
+    '''
+
+    def __init__(self):
+        self.entries = []
+        self.counts = {}
+
+    def add(self, value, count=1):
+        if not value:
+            return
+        if value not in self.counts:
+            self.counts[value] = 0
+            insort(self.entries, (value.casefold(), value))
+        self.counts[value] += count
+
+    def remove(self, value):
+        if value not in self.counts:
+            return
+        self.counts[value] -= 1
+        if self.counts[value] <= 0:
+            del self.counts[value]
+            entry = (value.casefold(), value)
+            del self.entries[bisect_left(self.entries, entry)]
+
+    def lookup(self, prefix, limit):
+        ''' Return List of at most limit values starting with prefix,
+            case insensitive, in alphabetical order.
+        '''
+        prefix = prefix.casefold()
+        position = bisect_left(self.entries, (prefix,))
+        results = []
+        for key, value in self.entries[position:position + limit]:
+            if not key.startswith(prefix):
+                break
+            results.append(value)
+        return results
+
+
+def field_values(field, value):
+    ''' Return List of indexed values of book field,
+        author string is split into Author names.
+    '''
+    if not value:
+        return []
+    if field == 'author':
+        return split_authors(value)
+    return [value]
+
+
+def apply_change(indexes, removed, added):
+    ''' Replace field values of removed Dict by those of added. '''
+    for field in FIELDS:
+        old = field_values(field, removed.get(field))
+        new = field_values(field, added.get(field))
+        if old == new:
+            continue
+        for value in old:
+            indexes[field].remove(value)
+        for value in new:
+            indexes[field].add(value)
+
+
+class BookSuggestions:
+    ''' Prefix indexes of all FIELDS, shared by the whole process. '''
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.refresher = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.indexes = None
+            self.built = 0
+            # Token of running build and changes signalled during it.
+            self.building = None
+            self.pending = []
+
+    def load(self):
+        ''' Return new indexes read from database. '''
+        indexes = {field: PrefixIndex() for field in FIELDS}
+        authors = Author.objects.annotate(count=Count('books')).filter(
+            count__gt=0)
+        for name, count in authors.values_list('name', 'count').iterator():
+            indexes['author'].add(name, count)
+        titles = Book.objects.values('title').annotate(count=Count('id'))
+        for row in titles.order_by().iterator():
+            indexes['title'].add(row['title'], row['count'])
+        return indexes
+
+    def build(self):
+        ''' Return indexes loaded without holding lock. Unless other build
+            runs or reset happened meanwhile, they replace current ones
+            after changes signalled during load are replayed on them.
+        '''
+        token = object()
+        with self.lock:
+            owner = self.building is None
+            if owner:
+                self.building = token
+                self.pending = []
+        try:
+            indexes = self.load()
+        finally:
+            with self.lock:
+                if owner and self.building is token:
+                    self.building = None
+                    pending, self.pending = self.pending, []
+                else:
+                    owner = False
+        with self.lock:
+            if owner:
+                for removed, added in pending:
+                    apply_change(indexes, removed, added)
+                self.indexes = indexes
+                self.built = time.monotonic()
+        return indexes
+
+    def refresh(self):
+        ''' Rebuild indexes in background thread. '''
+        try:
+            self.build()
+        finally:
+            connections.close_all()
+
+    def get_indexes(self):
+        with self.lock:
+            indexes = self.indexes
+            stale = (
+                time.monotonic() - self.built >
+                setting('AUTOCOMPLETE_MAX_AGE'))
+            refreshing = self.building is not None or (
+                self.refresher is not None and self.refresher.is_alive())
+            if indexes is not None and stale and not refreshing:
+                self.refresher = threading.Thread(
+                    target=self.refresh, daemon=True)
+                self.refresher.start()
+        if indexes is None:
+            indexes = self.build()
+        return indexes
+
+    def lookup(self, field, prefix, limit=10):
+        indexes = self.get_indexes()
+        with self.lock:
+            return indexes[field].lookup(prefix, limit)
+
+    def change(self, removed, added):
+        with self.lock:
+            if self.building is not None:
+                self.pending.append((removed, added))
+            if self.indexes is not None:
+                apply_change(self.indexes, removed, added)
+
+    def book_saved(self, book, previous=None):
+        ''' Update indexes with saved book.
+
+            Keyword arguments:
+            book -- saved Book
+            previous -- Dict of values book had in database, None if new
+        '''
+        self.change(
+            previous or {}, {field: getattr(book, field) for field in FIELDS})
+
+    def book_deleted(self, book, previous=None):
+        values = previous or {
+            field: getattr(book, field) for field in FIELDS}
+        self.change(values, {})
+
+
+suggestions = BookSuggestions()
@@ -0,0 +1,8 @@
+''' Benchmarks of librarian on synthetic catalogue.
+    Run by manage.py run_benchmarks, which creates a test database.
+'''
+from .generator import generate_books, generate_volumes
+from .runner import run_benchmarks
+from .scenarios import scenarios
+
+__all__ = ['generate_books', 'generate_volumes', 'run_benchmarks', 'scenarios']
@@ -0,0 +1,126 @@
+''' Deterministic generator of synthetic catalogue.
+    The same count and seed always give the same books, so timings of
+    different commits are measured on identical data.
+'''
+import datetime
+import random
+from librarian.models import Book
+from librarian import isbn as isbn_tools
+
+ADJECTIVES = [
+    'Silent', 'Red', 'Last', 'Hidden', 'Broken', 'Golden', 'Dark', 'Lost',
+    'Wild', 'Secret', 'Little', 'Ancient', 'Quiet', 'Burning', 'Frozen',
+    'Endless', 'Bitter', 'Distant', 'Sacred', 'Iron']
+NOUNS = [
+    'River', 'Garden', 'Kingdom', 'Night', 'House', 'Sea', 'Winter', 'War',
+    'Mountain', 'Letter', 'Empire', 'Forest', 'Child', 'Storm', 'Road',
+    'Island', 'Crown', 'Shadow', 'Bridge', 'Mirror', 'City', 'Star']
+PLACES = [
+    'Warsaw', 'the North', 'Paris', 'the Valley', 'Kraków', 'the Desert',
+    'Rome', 'the Coast', 'Vienna', 'the Moon']
+FIRST_NAMES = [
+    'Anna', 'Jan', 'Maria', 'Piotr', 'John', 'Emma', 'Olga', 'Tomasz',
+    'Sarah', 'Michael', 'Ewa', 'Karl', 'Sophie', 'Luca', 'Marta', 'David',
+    'Julia', 'Adam', 'Elena', 'Pierre']
+LAST_NAMES = [
+    'Kowalski', 'Smith', 'Nowak', 'Müller', 'Rossi', 'Dubois', 'Wiśniewska',
+    'Johnson', 'Lewandowski', 'Brown', 'García', 'Schmidt', 'Zielińska',
+    'Martin', 'Williams', 'Kamiński', 'Novak', 'Fischer', 'Moreau', 'Taylor']
+LANGUAGES = {
+    'en': 55, 'pl': 15, 'de': 8, 'fr': 7, 'es': 6, 'it': 5, 'ru': 4}
+TITLE_FORMS = [
+    '{adjective} {noun}', 'The {adjective} {noun}', 'The {noun} of {place}',
+    '{noun} and {other}', 'A {noun} in {place}',
+    '{adjective} {noun} of {place}']
+
+
+def zipf_weights(size, exponent=1.1):
+    ''' Return weights making first values much more popular than last. '''
+    return [1 / (rank ** exponent) for rank in range(1, size + 1)]
+
+
+def synthetic_isbn(number):
+    ''' Return valid ISBN-13 unique for number. '''
+    core = '978%09d' % (number % 10 ** 9)
+    return core + isbn_tools.check_digit13(core)
+
+
+def generate_books(count, seed=0):
+    ''' Return List of count unsaved Book instances.
+        Titles and authors follow Zipf like popularity, so some authors
+        have many books, 10% of books have two authors,
+        languages and publication years resemble a Polish library.
+
+        Keyword arguments:
+        count -- number of books
+        seed -- random seed
+    '''
+    rng = random.Random(seed)
+    authors = [
+        '%s %s' % (first, last)
+        for last in LAST_NAMES for first in FIRST_NAMES]
+    rng.shuffle(authors)
+    author_weights = zipf_weights(len(authors))
+    noun_weights = zipf_weights(len(NOUNS))
+    languages = list(LANGUAGES)
+    language_weights = list(LANGUAGES.values())
+
+    books = []
+    for number in range(count):
+        nouns = rng.choices(NOUNS, noun_weights, k=2)
+        title = rng.choice(TITLE_FORMS).format(
+            adjective=rng.choice(ADJECTIVES), noun=nouns[0], other=nouns[1],
+            place=rng.choice(PLACES))
+        if rng.random() < 0.3:
+            title += ' %d' % rng.randint(2, 9)
+        names = rng.choices(authors, author_weights, k=2)
+        author = names[0]
+        if rng.random() < 0.1 and names[1] != names[0]:
+            author = ','.join(names)
+        year = max(1900, 2023 - int(rng.expovariate(1 / 15)))
+        books.append(Book(
+            title=title,
+            author=author,
+            publication_date=datetime.date(
+                year, rng.randint(1, 12), rng.randint(1, 28)),
+            isbn=synthetic_isbn(seed * count + number),
+            page_count=min(2000, max(24, int(rng.lognormvariate(5.5, 0.5)))),
+            cover_link='https://books.google.com/books/content?id=%d' % number,
+            language=rng.choices(languages, language_weights)[0]))
+    return books
+
+
+def generate_volumes(count, seed=0):
+    ''' Return google api 'books#volumes' response of count volumes
+        made from generate_books. 5% of volumes have no ISBN
+        and 3% have incomplete publication date, like real responses.
+
+        Keyword arguments:
+        count -- number of volumes
+        seed -- random seed
+    '''
+    rng = random.Random(seed + 1)
+    items = []
+    for number, book in enumerate(generate_books(count, seed)):
+        identifiers = [
+            {'type': 'ISBN_13', 'identifier': book.isbn},
+            {'type': 'ISBN_10', 'identifier': isbn_tools.to_isbn10(book.isbn)}]
+        if rng.random() < 0.05:
+            identifiers = [{'type': 'OTHER', 'identifier': 'UOM:%d' % number}]
+        published = book.publication_date.isoformat()
+        if rng.random() < 0.03:
+            published = published[:3] + '?'
+        items.append({
+            'kind': 'books#volume',
+            'id': 'synthetic%d' % number,
+            'volumeInfo': {
+                'title': book.title,
+                'authors': book.author.split(','),
+                'publishedDate': published,
+                'industryIdentifiers': identifiers,
+                'pageCount': book.page_count,
+                'imageLinks': {'thumbnail': book.cover_link},
+                'language': book.language,
+            },
+        })
+    return {'kind': 'books#volumes', 'totalItems': count, 'items': items}
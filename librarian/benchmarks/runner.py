@@ -0,0 +1,74 @@
+from django.db import connection
+from django.utils import timezone
+import django
+import os
+import platform
+import statistics
+import subprocess
+import time
+from . import scenarios as registry
+
+
+def git_commit():
+    ''' Return commit of checked out source, None outside of git. '''
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(function, repeat, warmup=1):
+    ''' Return Dict with timings of repeat calls of function in seconds,
+        after warmup calls which are not measured.
+    '''
+    for _ in range(warmup):
+        function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return {
+        'runs': repeat,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'max': max(timings),
+        'result': result,
+    }
+
+
+def run_benchmarks(count=10000, seed=0, repeat=5, names=None, volumes=1000):
+    ''' Store synthetic catalogue in current database, time scenarios
+        and return Dict ready to be dumped as JSON.
+
+        Keyword arguments:
+        count -- number of books in catalogue
+        seed -- random seed of generated data
+        repeat -- measured runs of every case
+        names -- List of scenario names, all by default
+        volumes -- number of google volumes parsed and checked
+    '''
+    start = time.perf_counter()
+    data = registry.prepare(count, seed, volumes)
+    results = {
+        'meta': {
+            'books': count,
+            'volumes': volumes,
+            'seed': seed,
+            'repeat': repeat,
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'commit': git_commit(),
+            'started': timezone.now().isoformat(),
+            'setup_seconds': time.perf_counter() - start,
+        },
+        'results': {},
+    }
+    for name in names or registry.scenarios:
+        for case, function in registry.scenarios[name](data).items():
+            results['results'][name + '.' + case] = measure(function, repeat)
+    return results
@@ -0,0 +1,122 @@
+''' Timed benchmark scenarios.
+    Every scenario takes Dict with generated data and returns Dict of
+    case name: function, each function is timed separately.
+'''
+from django.core.cache import caches
+from django.db.models import Count
+from django.test import Client
+from librarian.models import Author, Book
+from librarian.result_cache import filter_cache
+from librarian import helpers
+from . import generator
+
+
+def clear_caches():
+    ''' Drop cached filter results and rendered rows, so every run
+        measures cold requests.
+    '''
+    filter_cache.clear()
+    for cache in caches.all():
+        cache.clear()
+
+
+def books_filter(data):
+    books = Book.objects.all()
+    sample = data['sample']
+    word = max(sample.title.split(), key=len)
+    filters = {
+        'author': {'author': sample.author_names()[0]},
+        'popular_author': {'author': data['popular_author']},
+        'title': {'title': word},
+        'language': {'language': 'pl'},
+        'publication_range': {
+            'publication_from': '1990-01-01', 'publication_to': '2000-12-31'},
+        'language_publication': {
+            'language': 'de', 'publication_from': '2010-01-01'},
+        'author_title': {
+            'author': sample.author_names()[0],
+            'title': word},
+    }
+
+    def case(values):
+        def run():
+            filtered = helpers.books_filter(books, values)
+            return len(list(filtered.order_by('id')[:100]))
+        return run
+    return {name: case(values) for name, values in filters.items()}
+
+
+def books_rest(data):
+    client = Client()
+
+    def page(limit):
+        def run():
+            clear_caches()
+            return len(client.get('/books_rest/?limit=%d' % limit).content)
+        return run
+
+    def stream():
+        response = client.get('/books_rest/?stream=true')
+        return sum(len(chunk) for chunk in response.streaming_content)
+
+    return {'page_100': page(100), 'page_1000': page(1000), 'stream': stream}
+
+
+def books_list(data):
+    client = Client()
+
+    def render(query, cold=True):
+        def run():
+            if cold:
+                clear_caches()
+            return len(client.get('/books_list/' + query).content)
+        return run
+
+    return {
+        'first_page': render(''),
+        'first_page_warm': render('', cold=False),
+        'sorted_by_title': render('?order=title&limit=200'),
+        'filtered_language': render('?language=pl'),
+    }
+
+
+def books_check_compatibility(data):
+    def run():
+        books = helpers.books_google_parse(data['volumes'])
+        helpers.books_check_compatibility(books)
+        return len(books)
+    return {'volumes': run}
+
+
+def books_google_parse(data):
+    def run():
+        return len(helpers.books_google_parse(data['volumes']))
+    return {'volumes': run}
+
+
+# Register of scenarios run by run_benchmarks.
+scenarios = {
+    'books_filter': books_filter,
+    'books_rest': books_rest,
+    'books_list': books_list,
+    'books_check_compatibility': books_check_compatibility,
+    'books_google_parse': books_google_parse,
+}
+
+
+def prepare(count, seed, volumes):
+    ''' Store generated catalogue, return Dict of data for scenarios.
+
+        Keyword arguments:
+        count -- number of stored books
+        seed -- random seed
+        volumes -- number of google volumes to parse and check
+    '''
+    helpers.books_bulk_save(generator.generate_books(count, seed))
+    popular = Author.objects.annotate(
+        count=Count('books')).order_by('-count').first()
+    return {
+        'sample': Book.objects.order_by('id')[count // 2],
+        'popular_author': popular.name,
+        'volumes': generator.generate_volumes(volumes, seed + 1),
+    }
@@ -0,0 +1,60 @@
+''' Catalogue version stamp, bumped on every save or delete of a book.
+    Lets views answer conditional requests without running the query.
+'''
+import hashlib
+from django.db.models import F
+from django.utils import timezone
+from librarian.models import CatalogueVersion
+
+VERSION_ID = 1
+
+
+def bump():
+    ''' Increase catalogue generation and set its modification time. '''
+    now = timezone.now()
+    updated = CatalogueVersion.objects.filter(id=VERSION_ID).update(
+        generation=F('generation') + 1, modified=now)
+    if not updated:
+        CatalogueVersion.objects.get_or_create(
+            id=VERSION_ID, defaults={'generation': 1, 'modified': now})
+
+
+def version(request=None):
+    ''' Return (generation, modified) of catalogue,
+        (0, None) if catalogue was never changed.
+        Result is memoized on provided request.
+
+        Keyword argument:
+        request -- optional HttpRequest used as memo
+    '''
+    memo = getattr(request, '_librarian_catalogue_version', None)
+    if memo:
+        return memo
+
+    memo = CatalogueVersion.objects.filter(id=VERSION_ID).values_list(
+        'generation', 'modified').first() or (0, None)
+    if request is not None:
+        request._librarian_catalogue_version = memo
+    return memo
+
+
+def cacheable(request):
+    return request.method in ('GET', 'HEAD')
+
+
+def etag(request, *args, **kwargs):
+    ''' Return ETag of view response, combines catalogue generation
+        with full path, so every filter set has its own tag.
+    '''
+    if not cacheable(request):
+        return None
+    generation, _ = version(request)
+    key = '%d:%s' % (generation, request.get_full_path())
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def last_modified(request, *args, **kwargs):
+    ''' Return datetime of last catalogue change or None. '''
+    if not cacheable(request):
+        return None
+    return version(request)[1]
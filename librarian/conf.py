@@ -0,0 +1,44 @@
+''' Librarian application settings.
+    Every value can be overridden in project settings
+    by the same name prefixed with LIBRARIAN_, i.e. LIBRARIAN_REST_PAGE_SIZE.
+'''
+from django.conf import settings
+
+DEFAULTS = {
+    'REST_PAGE_SIZE': 100,
+    'REST_PAGE_SIZE_MAX': 1000,
+    'REST_STREAM_CHUNK_SIZE': 2000,
+    'SEARCH_BACKEND': None,
+    'SEARCH_MIN_TOKEN': 3,
+    'SEARCH_MAX_CANDIDATES': 1000,
+    'GOOGLE_CONCURRENCY': 8,
+    'GOOGLE_TIMEOUT': (3.05, 10),
+    'GOOGLE_RETRIES': 3,
+    'GOOGLE_BACKOFF': 0.5,
+    'GOOGLE_POOL_SIZE': 10,
+    'GOOGLE_ASYNC_CONNECTIONS': 100,
+    'GOOGLE_CACHE': 'google',
+    'GOOGLE_CACHE_TIMEOUT': 600,
+    'IMPORT_BATCH_SIZE': 500,
+    'FILTER_CACHE_SIZE': 256,
+    'FILTER_CACHE_MAX_ROWS': 10000,
+    'LIST_PAGE_SIZE': 50,
+    'LIST_COUNT_MODE': 'approx',
+    'FRAGMENT_CACHE_TIMEOUT': 86400,
+    'AUTOCOMPLETE_MAX_AGE': 300,
+    'AUTOCOMPLETE_LIMIT': 10,
+    'IMPORT_JOB_CHUNK_SIZE': 20,
+    'IMPORT_JOB_TIMEOUT': 600,
+    'IMPORT_WORKER_SLEEP': 1.0,
+    'PERFORMANCE': False,
+    'METRICS': True,
+}
+
+
+def setting(name):
+    ''' Return value of librarian setting, falls back to its default.
+
+        Keyword argument:
+        name -- setting name without LIBRARIAN_ prefix
+    '''
+    return getattr(settings, 'LIBRARIAN_' + name, DEFAULTS[name])
@@ -1,6 +1,7 @@
 from django import forms
 from django.forms import ModelForm
 from librarian import models
+from librarian.conf import setting
 
 
 class BooksImportForm(forms.Form):
@@ -27,10 +28,14 @@ class BooksImportForm(forms.Form):
 class BooksFilterForm(forms.Form):
     author = forms.CharField(
         max_length=models.AUTHOR_MAX, label="author",
-        required=False, widget=forms.TextInput())
+        required=False, widget=forms.TextInput(attrs={
+            "list": "author_suggestions", "autocomplete": "off",
+            "data-autocomplete": "author"}))
     title = forms.CharField(
         max_length=models.TITLE_MAX, label="title",
-        required=False, widget=forms.TextInput())
+        required=False, widget=forms.TextInput(attrs={
+            "list": "title_suggestions", "autocomplete": "off",
+            "data-autocomplete": "title"}))
     language = forms.CharField(
         max_length=models.LANGUAGE_MAX, label="language",
         required=False, widget=forms.TextInput(attrs={"style": "width: 50px"}))
@@ -40,12 +45,46 @@ class BooksFilterForm(forms.Form):
     publication_to = forms.DateField(
         label="to", required=False,
         widget=forms.TextInput(attrs={"placeholder": "YYYY-mm-dd"}))
+    order = forms.ChoiceField(
+        label="sort", required=False, choices=[
+            ('id', 'Recently added last'),
+            ('title', 'Title'),
+            ('author', 'Author'),
+            ('publication_date', 'Oldest first'),
+            ('-publication_date', 'Newest first')])
+    limit = forms.TypedChoiceField(
+        label="per page", required=False, coerce=int, empty_value=None,
+        choices=[(size, size) for size in (25, 50, 100, 200)])
+    cursor = forms.CharField(required=False, widget=forms.HiddenInput())
+    before = forms.CharField(required=False, widget=forms.HiddenInput())
+
+    def clean_order(self):
+        return self.cleaned_data['order'] or 'id'
+
+    def clean_limit(self):
+        return self.cleaned_data['limit'] or setting('LIST_PAGE_SIZE')
+
+
+class BooksPageForm(forms.Form):
+    limit = forms.IntegerField(min_value=1, required=False)
+    cursor = forms.CharField(required=False)
+    order = forms.CharField(required=False)
+    stream = forms.BooleanField(required=False)
+
+    def clean_limit(self):
+        limit = self.cleaned_data['limit']
+        if not limit:
+            return setting('REST_PAGE_SIZE')
+        return min(limit, setting('REST_PAGE_SIZE_MAX'))
+
+    def clean_order(self):
+        return self.cleaned_data['order'] or 'id'
 
 
 class BooksChangeForm(ModelForm):
     class Meta:
         model = models.Book
-        fields = '__all__'
+        exclude = ['authors']
         widgets = {
             "publication_date": forms.TextInput(
                 attrs={"placeholder": "YYYY-mm-dd"}),
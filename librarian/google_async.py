@@ -0,0 +1,86 @@
+''' Asynchronous client for google books api, used by async views.
+    Non-blocking requests are sent by httpx, required by librarian.
+    Requests are counted in google_client stats.
+'''
+import asyncio
+import time
+import weakref
+import httpx
+from librarian.conf import setting
+from . import google_client
+from . import instrumentation
+
+# Exceptions raised by get on failed requests
+ERRORS = (httpx.HTTPError,)
+
+
+# httpx.AsyncClient is bound to event loop it was first used in
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    ''' Return httpx.AsyncClient shared within running event loop. '''
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        timeout = setting('GOOGLE_TIMEOUT')
+        if isinstance(timeout, (tuple, list)):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=setting('GOOGLE_ASYNC_CONNECTIONS'),
+                max_keepalive_connections=setting('GOOGLE_POOL_SIZE')))
+        _clients[loop] = client
+    return client
+
+
+def reset_clients():
+    ''' Forget shared clients, next get_client call creates new one. '''
+    _clients.clear()
+
+
+def retry_delay(response, attempt):
+    ''' Return seconds to wait before next attempt,
+        honours numeric Retry-After header.
+    '''
+    retry_after = response.headers.get('Retry-After', '') if response else ''
+    if retry_after.isdigit():
+        return int(retry_after)
+    return setting('GOOGLE_BACKOFF') * 2 ** attempt
+
+
+async def get(url, params=None):
+    ''' Return response of GET, 429/5xx responses and connection errors
+        are retried with exponential backoff like in google_client.
+
+        Keyword arguments:
+        url -- requested url
+        params -- Dict of query string parameters
+    '''
+    start = time.monotonic()
+    retries = setting('GOOGLE_RETRIES')
+    try:
+        for attempt in range(retries + 1):
+            response = None
+            try:
+                response = await get_client().get(url, params=params)
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+            else:
+                if (response.status_code not in google_client.RETRY_STATUSES
+                        or attempt == retries):
+                    if response.status_code >= 500:
+                        google_client.count('errors')
+                    return response
+            google_client.count('retries')
+            await asyncio.sleep(retry_delay(response, attempt))
+    except httpx.HTTPError:
+        google_client.count('errors')
+        raise
+    finally:
+        seconds = time.monotonic() - start
+        google_client.count('requests')
+        google_client.count('seconds', seconds)
+        instrumentation.record('google', seconds)
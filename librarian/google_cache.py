@@ -0,0 +1,100 @@
+''' Cache of google books api responses, backed by Django cache framework.
+    Uses LIBRARIAN_GOOGLE_CACHE alias if configured, default cache otherwise.
+    Search results seed entries of their volumes, so import of volumes
+    found a moment ago does not touch the network.
+'''
+import hashlib
+import threading
+from django.conf import settings
+from django.core.cache import caches
+from librarian.conf import setting
+from . import metrics
+
+SEARCH_PREFIX = 'librarian:google:search:'
+VOLUME_PREFIX = 'librarian:google:volume:'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _count(hits, misses):
+    with _stats_lock:
+        _stats['hits'] += hits
+        _stats['misses'] += misses
+
+
+def get_cache():
+    alias = setting('GOOGLE_CACHE')
+    if alias not in settings.CACHES:
+        alias = 'default'
+    return caches[alias]
+
+
+def normalize_query(q):
+    ''' Return q lowercased with collapsed whitespace. '''
+    return ' '.join(q.casefold().split())
+
+
+def search_key(q):
+    digest = hashlib.md5(normalize_query(q).encode()).hexdigest()
+    return SEARCH_PREFIX + digest
+
+
+def volume_key(direct_id):
+    # Volume ids are case sensitive, hashed as they are.
+    digest = hashlib.md5(str(direct_id).encode()).hexdigest()
+    return VOLUME_PREFIX + digest
+
+
+def cacheable(data):
+    return isinstance(data, dict) and 'error' not in data
+
+
+def get_search(q):
+    ''' Return cached json of search or None. '''
+    data = get_cache().get(search_key(q))
+    _count(data is not None, data is None)
+    return data
+
+
+def set_search(q, data):
+    ''' Store json of search and seed its volumes. '''
+    if not cacheable(data):
+        return
+    timeout = setting('GOOGLE_CACHE_TIMEOUT')
+    volumes = {}
+    for item in data.get('items', []):
+        if item.get('id'):
+            volume = dict(item)
+            volume.setdefault('kind', 'books#volume')
+            volumes[volume_key(item['id'])] = volume
+    cache = get_cache()
+    cache.set_many(volumes, timeout)
+    cache.set(search_key(q), data, timeout)
+
+
+def get_volumes(ids):
+    ''' Return Dict of id: json for volumes present in cache. '''
+    keys = {volume_key(direct_id): direct_id for direct_id in ids}
+    found = get_cache().get_many(list(keys))
+    _count(len(found), len(keys) - len(found))
+    return {keys[key]: data for key, data in found.items()}
+
+
+def get_volume(direct_id):
+    return get_volumes([direct_id]).get(direct_id)
+
+
+def set_volume(direct_id, data):
+    if cacheable(data):
+        get_cache().set(
+            volume_key(direct_id), data, setting('GOOGLE_CACHE_TIMEOUT'))
+
+
+def stats():
+    ''' Return Dict with hits and misses counters. '''
+    with _stats_lock:
+        return dict(_stats)
+
+
+metrics.register_cache('google', stats)
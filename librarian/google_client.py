@@ -0,0 +1,133 @@
+''' Process wide HTTP client for google books api.
+    Keeps pooled keep-alive connections, applies timeouts
+    and retries 429/5xx responses with exponential backoff.
+'''
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from librarian.conf import setting
+from . import instrumentation
+from . import metrics
+
+API_URL = "https://www.googleapis.com/books/v1/volumes"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {'requests': 0, 'errors': 0, 'retries': 0, 'seconds': 0.0}
+
+
+def count(name, value=1):
+    with _stats_lock:
+        _stats[name] += value
+
+
+class CountingRetry(Retry):
+    ''' Retry which counts every retry attempt in client stats.
+        Increment exhausting retries raises and sends no request,
+        so it is not counted.
+    '''
+
+    def increment(self, *args, **kwargs):
+        retry = super().increment(*args, **kwargs)
+        count('retries')
+        return retry
+
+
+def get_session():
+    ''' Return shared requests.Session, created on first use. '''
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = CountingRetry(
+                total=setting('GOOGLE_RETRIES'),
+                backoff_factor=setting('GOOGLE_BACKOFF'),
+                status_forcelist=RETRY_STATUSES,
+                respect_retry_after_header=True,
+                raise_on_status=False)
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=setting('GOOGLE_POOL_SIZE'),
+                max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def reset_session():
+    ''' Close shared session, next get_session call creates new one. '''
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get(url, params=None):
+    ''' Return requests.Response of GET sent through shared session.
+
+        Keyword arguments:
+        url -- requested url
+        params -- Dict of query string parameters
+    '''
+    start = time.monotonic()
+    try:
+        response = get_session().get(
+            url, params=params, timeout=setting('GOOGLE_TIMEOUT'))
+        # 5xx left after retries is returned, not raised.
+        if response.status_code >= 500:
+            count('errors')
+        return response
+    except requests.RequestException:
+        count('errors')
+        raise
+    finally:
+        seconds = time.monotonic() - start
+        count('requests')
+        count('seconds', seconds)
+        instrumentation.record('google', seconds)
+
+
+def stats():
+    ''' Return Dict with request, error and retry counters. '''
+    with _stats_lock:
+        return dict(_stats)
+
+
+def pool_stats():
+    ''' Return Dict with request counters and state of connection pools. '''
+    result = stats()
+
+    pools = []
+    with _session_lock:
+        adapter = _session.get_adapter(API_URL) if _session else None
+    if adapter:
+        manager = adapter.poolmanager
+        for key in manager.pools.keys():
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            idle = list(pool.pool.queue) if pool.pool else []
+            pools.append({
+                'host': pool.host,
+                'connections': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': len([connection for connection in idle if connection]),
+                'maxsize': pool.pool.maxsize if pool.pool else 0,
+            })
+    result['pools'] = pools
+    return result
+
+
+for name, documentation in [
+        ('requests', 'Google api requests.'),
+        ('errors', 'Google api requests failed after retries.'),
+        ('retries', 'Google api request retries.')]:
+    metrics.registry.register(metrics.CallbackMetric(
+        'librarian_google_%s_total' % name, documentation, 'counter',
+        lambda name=name: [({}, stats()[name])]))
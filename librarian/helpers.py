@@ -1,15 +1,39 @@
+from django.core import serializers
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
-from django.db.utils import DataError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Max, Min, Q
+from django.db.utils import DatabaseError, IntegrityError
+from django.utils import timezone
+from django.utils.translation import gettext as _
 from dateutil.parser import parse, ParserError
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+import asyncio
 import requests
+import base64
+import binascii
+import json
+import logging
 import re
-from librarian.models import Book
+import time
+from librarian.models import Book, split_authors
+from librarian.conf import setting
 from . import validators
 from . import forms
+from . import search
+from . import google_client
+from . import google_async
+from . import google_cache
+from . import signals
+from . import catalogue
+from . import instrumentation
+from . import metrics
+from .result_cache import filter_cache
 
 book_filters = {
-    'author': lambda books, author: books.filter(author__exact=author),
-    'title': lambda books, title: books.filter(title__icontains=title),
+    'author': lambda books, author: books_by_authors(books, author),
+    'title': lambda books, title: search.books_search(books, title),
     'language': lambda books, language: books.filter(language__exact=language),
     'publication_from': lambda books, publication_from: books.filter(
         publication_date__gte=publication_from),
@@ -17,6 +41,39 @@ book_filters = {
         publication_date__lte=publication_to),
 }
 
+logger = logging.getLogger(__name__)
+
+TOO_LARGE = 'too large'
+
+book_columns = (
+    'title', 'author', 'publication_date', 'isbn',
+    'page_count', 'cover_link', 'language')
+
+book_upsert_fields = list(book_columns) + ['updated_at']
+
+# Serialized by books_rest: concrete columns only, relations would
+# cost a query per book. Internal isbn13 key is left out.
+book_rest_fields = [
+    field.name for field in Book._meta.concrete_fields
+    if not field.primary_key and field.name != 'isbn13']
+
+book_orderings = {
+    'id': ('id',),
+    'publication_date': ('publication_date', 'id'),
+    '-publication_date': ('-publication_date', '-id'),
+    'title': ('title', 'id'),
+    'author': ('author', 'id'),
+}
+
+
+def books_by_authors(books, author):
+    ''' Return QuerySet of books written by every author
+        from comma separated author string.
+    '''
+    for name in split_authors(author):
+        books = books.filter(authors__name=name)
+    return books
+
 
 def books_get_form_instance(id, form=None):
     ''' Return BooksChangeForm with attached instance.
@@ -53,27 +110,309 @@ def books_save_book_form(id, form):
     '''
     form = books_get_form_instance(id, form)
     if(form.is_valid()):
-        form.save()
+        try:
+            with transaction.atomic():
+                form.save()
+        except IntegrityError:
+            form.add_error('isbn', 'Book with this ISBN already exists.')
+            return False
         return True
     return False
 
 
-def books_filter(books, filters):
+def books_filter(books, filters, ranked=False):
     ''' Return QuerySet filtered version of provided one.
         Uses book_filters dict as filters register.
 
         Keyword arguments:
         books -- QuerySet that should be filtered
         filters -- Dict with filter key: value
+        ranked -- order by relevance to searched title
     '''
     for field in filters:
         if field in book_filters:
             value = filters[field]
             if(value):
                 books = book_filters[field](books, value)
+    if ranked and filters.get('title'):
+        books = search.books_rank(books, filters['title'])
     return books
 
 
+def books_keyset(fields, values):
+    ''' Return Q selecting rows placed after provided values
+        in order given by fields.
+
+        Keyword arguments:
+        fields -- Tuple of ordering fields, '-' prefix for descending
+        values -- Values of ordering fields of last row on previous page
+    '''
+    condition = Q()
+    equal = Q()
+    for field, value in zip(fields, values):
+        name = field.lstrip('-')
+        lookup = '__lt' if field.startswith('-') else '__gt'
+        condition |= equal & Q(**{name + lookup: value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def books_cursor_encode(book, ordering):
+    ''' Return opaque cursor pointing right after provided book.
+
+        Keyword arguments:
+        book -- last Book of the page
+        ordering -- key of book_orderings used for the page
+    '''
+    values = [
+        getattr(book, field.lstrip('-'))
+        for field in book_orderings[ordering]]
+    data = json.dumps([ordering, values], cls=DjangoJSONEncoder)
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def books_cursor_decode(cursor, ordering):
+    ''' Return List of ordering values stored in cursor.
+        Raises ValueError if cursor is malformed or
+        was issued for different ordering.
+
+        Keyword arguments:
+        cursor -- str obtained from books_cursor_encode
+        ordering -- key of book_orderings expected in cursor
+    '''
+    fields = book_orderings[ordering]
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        cursor_ordering, values = data
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('Malformed cursor')
+    if cursor_ordering != ordering or len(values) != len(fields):
+        raise ValueError('Cursor does not match ordering')
+
+    try:
+        return [
+            Book._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(fields, values)]
+    except ValidationError:
+        raise ValueError('Malformed cursor')
+
+
+def books_reverse(fields):
+    ''' Return Tuple of ordering fields with flipped directions. '''
+    return tuple(
+        field[1:] if field.startswith('-') else '-' + field
+        for field in fields)
+
+
+def books_order(books, order='id', cursor=None, backward=False):
+    ''' Return QuerySet ordered by stable key,
+        starting right after cursor if provided.
+
+        Keyword arguments:
+        books -- QuerySet that should be ordered
+        order -- key of book_orderings
+        cursor -- optional cursor returned with previous page
+        backward -- walk in reversed order, starting right before cursor
+    '''
+    if order not in book_orderings:
+        raise ValueError('Unknown ordering')
+    fields = book_orderings[order]
+    if backward:
+        fields = books_reverse(fields)
+    books = books.order_by(*fields)
+    if cursor:
+        values = books_cursor_decode(cursor, order)
+        books = books.filter(books_keyset(fields, values))
+    return books
+
+
+def books_paginate(books, order='id', cursor=None, limit=100,
+                   backward=False):
+    ''' Return (List of Book, next cursor or None) for single page.
+        Keyset based, so every page costs the same regardless of
+        its position. When backward, page placed right before cursor
+        is returned with cursor pointing before it.
+
+        Keyword arguments:
+        books -- QuerySet that should be paginated
+        order -- key of book_orderings
+        cursor -- optional cursor returned with previous page
+        limit -- maximal number of books on page
+        backward -- take page preceding cursor
+    '''
+    books = books_order(books, order, cursor, backward)
+    page = list(books[:limit + 1])
+    next_cursor = None
+    more = len(page) > limit
+    page = page[:limit]
+    if backward:
+        page.reverse()
+        if more:
+            next_cursor = books_cursor_encode(page[0], order)
+    elif more:
+        next_cursor = books_cursor_encode(page[-1], order)
+    return page, next_cursor
+
+
+def books_json_stream(books, chunk_size=2000, order='id'):
+    ''' Yield json array of serialized books piece by piece.
+        Same format as serializers.serialize('json', books),
+        but only one chunk of rows is held in memory at once.
+        Chunks are separate keyset queries, like in export_books,
+        because MySQL client buffers whole result of single query.
+
+        Keyword arguments:
+        books -- QuerySet that should be serialized
+        chunk_size -- number of rows fetched from database at once
+        order -- key of book_orderings
+    '''
+    if order not in book_orderings:
+        raise ValueError('Unknown ordering')
+    fields = book_orderings[order]
+    books = books.order_by(*fields)
+    serializer = serializers.get_serializer('python')()
+    separator = ''
+    yield '['
+    chunk = list(books[:chunk_size])
+    while chunk:
+        for book in chunk:
+            data = serializer.serialize([book], fields=book_rest_fields)[0]
+            yield separator + json.dumps(
+                data, cls=DjangoJSONEncoder, ensure_ascii=False)
+            separator = ', '
+        if len(chunk) < chunk_size:
+            break
+        values = [getattr(chunk[-1], field.lstrip('-')) for field in fields]
+        chunk = list(books.filter(books_keyset(fields, values))[:chunk_size])
+    yield ']'
+
+
+def books_filter_ids(filters, order='id', version=None):
+    ''' Return List of ids of books matching filters sorted by order,
+        served from filter_cache when possible. Return None if result
+        has more rows than LIBRARIAN_FILTER_CACHE_MAX_ROWS.
+
+        Keyword arguments:
+        filters -- Dict with filter key: value
+        order -- key of book_orderings
+        version -- catalogue version, read from database if not given
+    '''
+    if order not in book_orderings:
+        raise ValueError('Unknown ordering')
+    if version is None:
+        version = catalogue.version()
+    normalized = tuple(sorted(
+        (field, str(value)) for field, value in filters.items()
+        if field in book_filters and value))
+    key = (normalized, order, version)
+
+    ids = filter_cache.get(key)
+    if ids is None:
+        max_rows = setting('FILTER_CACHE_MAX_ROWS')
+        books = books_filter(Book.objects.all(), filters)
+        books = books.order_by(*book_orderings[order])
+        ids = list(books.values_list('id', flat=True)[:max_rows + 1])
+        if len(ids) > max_rows:
+            ids = TOO_LARGE
+        filter_cache.set(key, ids)
+
+    return None if ids is TOO_LARGE else ids
+
+
+def books_from_ids(ids):
+    ''' Return List of Book in order of provided ids,
+        ids of missing books are skipped.
+    '''
+    books = Book.objects.in_bulk(ids)
+    return [books[id] for id in ids if id in books]
+
+
+def books_paginate_cached(filters, order='id', cursor=None, limit=100,
+                          version=None, backward=False):
+    ''' Return (List of Book, next cursor or None) for single page,
+        same as books_paginate over books_filter result, but uses
+        filter_cache, so repeated filters only fetch rows of the page.
+
+        Keyword arguments:
+        filters -- Dict with filter key: value
+        order -- key of book_orderings
+        cursor -- optional cursor returned with previous page
+        limit -- maximal number of books on page
+        version -- catalogue version, read from database if not given
+        backward -- take page preceding cursor
+    '''
+    ids = books_filter_ids(filters, order, version)
+    position = 0
+    if ids is not None and cursor:
+        values = books_cursor_decode(cursor, order)
+        try:
+            position = ids.index(values[-1])
+        except ValueError:
+            ids = None
+    if ids is None:
+        books = books_filter(Book.objects.all(), filters)
+        return books_paginate(books, order, cursor, limit, backward)
+
+    if backward:
+        start = max(position - limit, 0)
+        page = books_from_ids(ids[start:position])
+        more = start > 0
+    else:
+        start = position + 1 if cursor else 0
+        page = books_from_ids(ids[start:start + limit])
+        more = start + limit < len(ids)
+
+    next_cursor = None
+    if page and more:
+        next_cursor = books_cursor_encode(
+            page[0] if backward else page[-1], order)
+    return page, next_cursor
+
+
+def books_count(filters, order='id', version=None, mode=None):
+    ''' Return (count, exact, capped) of books matching filters.
+        In 'approx' mode COUNT(*) is avoided: cached results are counted
+        in memory, unfiltered catalogue is estimated from table
+        statistics, large filtered results are reported as lower bound
+        LIBRARIAN_FILTER_CACHE_MAX_ROWS with capped set.
+
+        Keyword arguments:
+        filters -- Dict with filter key: value
+        order -- key of book_orderings, selects cached result to count
+        version -- catalogue version, read from database if not given
+        mode -- 'exact' or 'approx', LIBRARIAN_LIST_COUNT_MODE by default
+    '''
+    mode = mode or setting('LIST_COUNT_MODE')
+    ids = books_filter_ids(filters, order, version)
+    if ids is not None:
+        return len(ids), True, False
+    if mode == 'exact':
+        return books_filter(Book.objects.all(), filters).count(), True, False
+
+    if any(filters.get(field) for field in book_filters):
+        return setting('FILTER_CACHE_MAX_ROWS'), False, True
+    return books_estimate(), False, False
+
+
+def books_estimate():
+    ''' Return estimated number of books, without scanning table. '''
+    if connection.vendor == 'mysql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                [Book._meta.db_table])
+            row = cursor.fetchone()
+            if row and row[0] is not None:
+                return row[0]
+
+    # Primary key range, read from index boundaries only.
+    bounds = Book.objects.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return 0
+    return bounds['high'] - bounds['low'] + 1
+
+
 def books_google_fetch(search_data=None, direct_id=None):
     ''' Return string of json formatted result from google api.
         Only one argument should be provided.
@@ -82,23 +421,302 @@ def books_google_fetch(search_data=None, direct_id=None):
         search_data -- Dict with provided 'q' values for group search
         direct_id -- direct id of single book volume
     '''
-    url = "https://www.googleapis.com/books/v1/volumes"
+    url = google_client.API_URL
     q = ''
     if search_data:
-        q = search_data['search']
-        for k, v in search_data.items():
-            if(k == "search" or not v):
-                continue
-            q += '+' + k + ":" + v
-
-        if len(q) and q[0] == '+':
-            q = q[1:]
+        q = books_google_query(search_data)
+        cached = google_cache.get_search(q)
     elif direct_id:
         url += "/" + direct_id
+        cached = google_cache.get_volume(direct_id)
+    else:
+        cached = None
+
+    if cached is not None:
+        return cached
 
     querystring = {"q": q, 'country': 'pl'}
-    response = requests.request("GET", url, params=querystring)
-    return response.json()
+    response = google_client.get(url, params=querystring)
+    data = response.json()
+    if search_data:
+        google_cache.set_search(q, data)
+    elif direct_id:
+        google_cache.set_volume(direct_id, data)
+    return data
+
+
+def books_google_query(search_data):
+    ''' Return google api q parameter built from search form data.
+
+        Keyword argument:
+        search_data -- Dict with provided 'q' values for group search
+    '''
+    q = search_data['search']
+    for k, v in search_data.items():
+        if(k == "search" or not v):
+            continue
+        q += '+' + k + ":" + v
+
+    if len(q) and q[0] == '+':
+        q = q[1:]
+    return q
+
+
+async def books_google_fetch_async(search_data=None, direct_id=None):
+    ''' Asynchronous books_google_fetch, awaits google api
+        without blocking event loop.
+
+        Keyword arguments:
+        search_data -- Dict with provided 'q' values for group search
+        direct_id -- direct id of single book volume
+    '''
+    url = google_client.API_URL
+    q = ''
+    if search_data:
+        q = books_google_query(search_data)
+        cached = await sync_to_async(google_cache.get_search)(q)
+    elif direct_id:
+        url += "/" + direct_id
+        cached = await sync_to_async(google_cache.get_volume)(direct_id)
+    else:
+        cached = None
+
+    if cached is not None:
+        return cached
+
+    querystring = {"q": q, 'country': 'pl'}
+    response = await google_async.get(url, params=querystring)
+    data = response.json()
+    if search_data:
+        await sync_to_async(google_cache.set_search)(q, data)
+    elif direct_id:
+        await sync_to_async(google_cache.set_volume)(direct_id, data)
+    return data
+
+
+def books_google_fetch_volume(direct_id):
+    ''' Return json of single volume or None if fetch failed.
+
+        Keyword argument:
+        direct_id -- direct id of single book volume
+    '''
+    try:
+        return books_google_fetch(direct_id=direct_id)
+    except (requests.RequestException, ValueError) as error:
+        logger.warning('Fetch of volume %s failed: %s', direct_id, error)
+        return None
+
+
+def books_google_fetch_volumes(ids, concurrency=None):
+    ''' Return Dict of id: json, cached volumes are taken from cache,
+        remaining ones are fetched concurrently from google api.
+        Failed fetches are None, so they do not abort the batch.
+
+        Keyword arguments:
+        ids -- List of direct volume ids
+        concurrency -- max parallel fetches, LIBRARIAN_GOOGLE_CONCURRENCY
+                       by default
+    '''
+    ids = list(dict.fromkeys(ids))
+    volumes = google_cache.get_volumes(ids)
+    missing = [direct_id for direct_id in ids if direct_id not in volumes]
+    if missing:
+        workers = min(
+            concurrency or setting('GOOGLE_CONCURRENCY'), len(missing))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                instrumentation.in_context(books_google_fetch_volume),
+                missing)
+            volumes.update(zip(missing, results))
+    return {direct_id: volumes[direct_id] for direct_id in ids}
+
+
+async def books_google_fetch_volumes_async(ids, concurrency=None):
+    ''' Asynchronous books_google_fetch_volumes, remaining volumes
+        are awaited together instead of in thread pool.
+
+        Keyword arguments:
+        ids -- List of direct volume ids
+        concurrency -- max parallel fetches, LIBRARIAN_GOOGLE_CONCURRENCY
+                       by default
+    '''
+    ids = list(dict.fromkeys(ids))
+    volumes = await sync_to_async(google_cache.get_volumes)(ids)
+    missing = [direct_id for direct_id in ids if direct_id not in volumes]
+    semaphore = asyncio.Semaphore(
+        concurrency or setting('GOOGLE_CONCURRENCY'))
+
+    async def fetch(direct_id):
+        async with semaphore:
+            try:
+                return await books_google_fetch_async(direct_id=direct_id)
+            except google_async.ERRORS + (ValueError,) as error:
+                logger.warning(
+                    'Fetch of volume %s failed: %s', direct_id, error)
+                return None
+
+    results = await asyncio.gather(*map(fetch, missing))
+    volumes.update(zip(missing, results))
+    return {direct_id: volumes[direct_id] for direct_id in ids}
+
+
+def books_bulk_save(books, batch_size=None, validated=False):
+    ''' Validate books and upsert valid ones in single transaction.
+        Books with isbn13 of stored book update it instead of
+        being inserted, last one wins if several share isbn13.
+        Return List of {'book': Book, 'saved': bool, 'error': str or None}
+        in order of provided books.
+
+        Keyword arguments:
+        books -- List of unsaved Book instances
+        batch_size -- rows per INSERT, LIBRARIAN_IMPORT_BATCH_SIZE by default
+        validated -- books already passed validators.validate_books,
+                     skip column format checks
+    '''
+    start = time.perf_counter()
+    errors = set() if validated else validators.format_errors(books)
+    results = []
+    latest = {}
+    for index, book in enumerate(books):
+        result = {'book': book, 'saved': False, 'error': None}
+        if index in errors:
+            result['error'] = _('Incorrect Format')
+        else:
+            key = book.set_isbn13()
+            if key:
+                latest[key] = result
+        results.append(result)
+
+    valid = []
+    for result in results:
+        key = result['book'].isbn13
+        if result['error']:
+            continue
+        if key and latest[key] is not result:
+            result['error'] = 'Replaced by later book with same ISBN.'
+            continue
+        valid.append(result)
+
+    batch_size = batch_size or setting('IMPORT_BATCH_SIZE')
+    try:
+        with transaction.atomic():
+            updated = books_upsert(
+                [result['book'] for result in valid], batch_size)
+    except DatabaseError:
+        # Bulk insert is all or nothing, find out which rows failed.
+        updated = books_save_each(valid)
+    else:
+        for result in valid:
+            result['saved'] = True
+
+    saved = [result['book'] for result in results if result['saved']]
+    if saved:
+        signals.books_bulk_created.send(
+            sender=Book, books=saved, updated=updated)
+    metrics.imported_books.inc(len(saved), result='saved')
+    metrics.imported_books.inc(len(results) - len(saved), result='rejected')
+    metrics.import_seconds.inc(time.perf_counter() - start)
+    return results
+
+
+def books_upsert(books, batch_size=None):
+    ''' Insert books, updating stored ones with the same isbn13 instead.
+        Existing keys are found with single unique index probe per batch.
+        Return List of books which updated stored rows, on MySQL it also
+        holds batches where row inserted since the probe was updated.
+
+        Keyword arguments:
+        books -- List of valid Book instances with isbn13 set
+        batch_size -- rows per query, LIBRARIAN_IMPORT_BATCH_SIZE by default
+    '''
+    batch_size = batch_size or setting('IMPORT_BATCH_SIZE')
+    keys = [book.isbn13 for book in books if book.isbn13]
+    existing = {}
+    for start in range(0, len(keys), batch_size):
+        existing.update(Book.objects.filter(
+            isbn13__in=keys[start:start + batch_size]).values_list(
+            'isbn13', 'id'))
+
+    updated = []
+    created = []
+    now = timezone.now()
+    for book in books:
+        book.pk = existing.get(book.isbn13)
+        if book.pk is None:
+            created.append(book)
+        else:
+            book.updated_at = now
+            updated.append(book)
+    Book.objects.bulk_update(
+        updated, book_upsert_fields, batch_size=batch_size)
+
+    # Rows inserted concurrently since the probe are updated in place
+    # where the backend has INSERT ... ON CONFLICT / ON DUPLICATE KEY.
+    # Elsewhere IntegrityError sends books_bulk_save to books_save_each,
+    # which probes again.
+    if connection.vendor == 'mysql':
+        for start in range(0, len(created), batch_size):
+            batch = created[start:start + batch_size]
+            with connection.cursor() as cursor:
+                cursor.execute(*books_upsert_sql(batch))
+                # MySQL counts 1 per inserted and 2 per updated row.
+                if cursor.rowcount != len(batch):
+                    updated += batch
+        return updated
+
+    options = {}
+    features = connection.features
+    if getattr(features, 'supports_update_conflicts', False):
+        options = {
+            'update_conflicts': True, 'update_fields': book_upsert_fields}
+        if features.supports_update_conflicts_with_target:
+            options['unique_fields'] = ['isbn13']
+    Book.objects.bulk_create(created, batch_size=batch_size, **options)
+    return updated
+
+
+def books_upsert_sql(books):
+    ''' Return (sql, params) of MySQL INSERT ... ON DUPLICATE KEY UPDATE
+        of books, rows colliding on isbn13 get book_upsert_fields updated.
+    '''
+    quote = connection.ops.quote_name
+    fields = [
+        field for field in Book._meta.concrete_fields
+        if not field.primary_key]
+    row = '(%s)' % ', '.join(['%s'] * len(fields))
+    params = [
+        field.get_db_prep_save(field.pre_save(book, True), connection)
+        for book in books for field in fields]
+    sql = 'INSERT INTO %s (%s) VALUES %s ON DUPLICATE KEY UPDATE %s' % (
+        quote(Book._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join([row] * len(books)),
+        ', '.join(
+            '%s = VALUES(%s)' % (quote(name), quote(name))
+            for name in book_upsert_fields))
+    return sql, params
+
+
+def books_save_each(results):
+    ''' Upsert books one by one, each in own savepoint.
+        Marks provided results with outcome.
+        Return List of books which updated stored rows.
+
+        Keyword argument:
+        results -- List of {'book': Book, 'saved': bool, 'error': str} dicts
+    '''
+    updated = []
+    with transaction.atomic():
+        for result in results:
+            book = result['book']
+            try:
+                with transaction.atomic():
+                    updated += books_upsert([book])
+                result['saved'] = True
+            except DatabaseError as error:
+                book.pk = None
+                result['error'] = str(error)
+    return updated
 
 
 def books_google_import(data):
@@ -108,19 +726,59 @@ def books_google_import(data):
         Keyword argument:
         data -- Dict of import ids i.e. {'import<id>: id'}
     '''
-    done = False
-    for checkbox in data:
-        if re.match('import.*', checkbox):
-            json_data = books_google_fetch(direct_id=data[checkbox])
-            try:
-                book = books_google_parse(json_data)
-                if book:
-                    book.get('book').save()
-                    done = True
-            except (ValidationError, DataError):
-                pass
+    results = books_google_import_ids(books_google_import_selection(data))
+    return any(result['saved'] for result in results)
+
+
+def books_google_import_selection(data):
+    ''' Return List of google volume ids selected for import.
+
+        Keyword argument:
+        data -- Dict of import ids i.e. {'import<id>: id'}
+    '''
+    return [
+        data[checkbox] for checkbox in data
+        if re.match('import.*', checkbox)]
+
+
+def books_google_import_ids(ids):
+    ''' Fetch google volumes, parse and save them.
+        Return List of books_bulk_save results,
+        volumes which could not be fetched or parsed are skipped.
+
+        Keyword argument:
+        ids -- List of google volume ids
+    '''
+    volumes = books_google_fetch_volumes(ids)
+
+    books = []
+    for json_data in volumes.values():
+        if not json_data:
+            continue
+        book = books_google_parse(json_data)
+        if book:
+            books.append(book.get('book'))
+
+    return books_bulk_save(books)
 
-    return done
+
+async def books_google_import_async(data):
+    ''' Asynchronous books_google_import, saving runs in ORM thread.
+        Return True if at least one was saved.
+
+        Keyword argument:
+        data -- Dict of import ids i.e. {'import<id>: id'}
+    '''
+    ids = books_google_import_selection(data)
+    volumes = await books_google_fetch_volumes_async(ids)
+    books = []
+    for json_data in volumes.values():
+        book = books_google_parse(json_data) if json_data else None
+        if book:
+            books.append(book.get('book'))
+
+    results = await sync_to_async(books_bulk_save)(books)
+    return any(result['saved'] for result in results)
 
 
 def books_google_get_book(data):
@@ -163,13 +821,11 @@ def books_check_compatibility(books):
         Keyword argument:
         books -- List with {'direct_id': 'id','book': Book} dicts
     '''
-    for book_bundle in books:
-        book = book_bundle.get("book")
-        try:
-            validators.check_duplicates(book)
-            book.clean()
-        except ValidationError as validation:
-            book_bundle["validation"] = validation.code
+    codes = validators.validate_books(
+        [book_bundle.get("book") for book_bundle in books])
+    for book_bundle, code in zip(books, codes):
+        if code:
+            book_bundle["validation"] = code
 
 
 def books_google_parse(data):
@@ -0,0 +1,132 @@
+''' Collects timings of SQL queries, google api calls and template
+    rendering for PerformanceMiddleware and MetricsMiddleware.
+    Measured code calls record, which adds to RequestMetrics of
+    the current request held in a context variable and to process
+    wide histograms of librarian.metrics.
+'''
+from collections import defaultdict
+from contextlib import contextmanager
+from django.template.backends.django import DjangoTemplates
+import contextvars
+import threading
+import time
+from . import metrics
+
+_collector = contextvars.ContextVar('librarian_request_metrics', default=None)
+
+
+class RequestMetrics:
+    ''' Count and total seconds of measured operations by name,
+        safe to update from worker threads of the request.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    def add(self, name, seconds):
+        with self.lock:
+            self.counts[name] += 1
+            self.seconds[name] += seconds
+
+    def server_timing(self, total):
+        ''' Return Server-Timing header value, durations in ms.
+
+            Keyword argument:
+            total -- wall time of request in seconds
+        '''
+        with self.lock:
+            entries = [
+                '%s;dur=%.1f;desc="%d"' % (
+                    name, self.seconds[name] * 1000, self.counts[name])
+                for name in sorted(self.counts)]
+        entries.append('total;dur=%.1f' % (total * 1000))
+        return ', '.join(entries)
+
+
+def request_metrics(request):
+    ''' Return RequestMetrics of request, shared by middlewares. '''
+    collector = getattr(request, '_librarian_metrics', None)
+    if collector is None:
+        collector = request._librarian_metrics = RequestMetrics()
+    return collector
+
+
+@contextmanager
+def collecting(metrics):
+    ''' Record operations of enclosed code into metrics. '''
+    token = _collector.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _collector.reset(token)
+
+
+def record(name, seconds):
+    ''' Add operation to process metrics and metrics of current request.
+
+        Keyword arguments:
+        name -- operation name i.e. 'db', 'google', 'template'
+        seconds -- duration of operation
+    '''
+    metrics.observe_operation(name, seconds)
+    collector = _collector.get()
+    if collector is not None:
+        collector.add(name, seconds)
+
+
+def in_context(function):
+    ''' Return function running in copy of caller context,
+        so thread pool workers record into metrics of the request.
+    '''
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(function, *args, **kwargs)
+    return run
+
+
+def query_wrapper(execute, sql, params, many, context):
+    ''' Database execute wrapper timing every query,
+        installed on every connection when it is created.
+    '''
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record('db', time.perf_counter() - start)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    ''' connection_created receiver adding query_wrapper. '''
+    if query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_wrapper)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    ''' DjangoTemplates backend recording render time of templates
+        rendered by views, included templates count to their parent.
+    '''
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return InstrumentedTemplate(super().get_template(template_name))
+
+
+class InstrumentedTemplate:
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            record('template', time.perf_counter() - start)
@@ -0,0 +1,98 @@
+''' ISBN normalization, checksum validation and conversion.
+    canonical returns key used for duplicate detection and Book.isbn13,
+    canonical_many is its batch version for imports.
+'''
+from functools import lru_cache
+import re
+
+CACHE_SIZE = 65536
+
+SEPARATORS = re.compile(r'[\s-]')
+ISBN10 = re.compile(r'\d{9}[\dX]')
+ISBN13 = re.compile(r'97[89]\d{10}')
+
+
+def normalize(value):
+    ''' Return value without separators, with uppercase check digit. '''
+    return SEPARATORS.sub('', value or '').upper()
+
+
+def check_digit10(digits):
+    ''' Return check digit of first 9 digits of ISBN-10. '''
+    total = sum(
+        int(digit) * weight
+        for digit, weight in zip(digits[:9], range(10, 1, -1)))
+    digit = (11 - total % 11) % 11
+    return 'X' if digit == 10 else str(digit)
+
+
+def check_digit13(digits):
+    ''' Return check digit of first 12 digits of ISBN-13. '''
+    total = sum(
+        int(digit) * (3 if position % 2 else 1)
+        for position, digit in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def is_isbn10(value):
+    ''' Return True if normalized value is ISBN-10 with valid checksum. '''
+    return bool(ISBN10.fullmatch(value)) and check_digit10(value) == value[9]
+
+
+def is_isbn13(value):
+    ''' Return True if normalized value is ISBN-13 with valid checksum. '''
+    return bool(ISBN13.fullmatch(value)) and check_digit13(value) == value[12]
+
+
+def isbn10_to_isbn13(isbn10):
+    core = '978' + isbn10[:9]
+    return core + check_digit13(core)
+
+
+def isbn13_to_isbn10(isbn13):
+    core = isbn13[3:12]
+    return core + check_digit10(core)
+
+
+def to_isbn13(value):
+    ''' Return ISBN-13 form of valid ISBN-10 or ISBN-13, None if value
+        is not a valid ISBN or is a placeholder made of zeros.
+    '''
+    value = normalize(value)
+    if not value.strip('0'):
+        return None
+    if is_isbn13(value):
+        return value
+    if is_isbn10(value):
+        return isbn10_to_isbn13(value)
+    return None
+
+
+def to_isbn10(value):
+    ''' Return ISBN-10 form of valid ISBN, None if value is not valid
+        or is ISBN-13 with 979 prefix, which has no ISBN-10 form.
+    '''
+    isbn13 = to_isbn13(value)
+    if isbn13 is None or not isbn13.startswith('978'):
+        return None
+    return isbn13_to_isbn10(isbn13)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def canonical(value):
+    ''' Return canonical ISBN-13 key of value, None if it is not valid.
+        Memoized, the same isbns come back on every import and page.
+    '''
+    return to_isbn13(value)
+
+
+def canonical_many(values):
+    ''' Return List of canonical keys for values, every distinct value
+        is converted once.
+
+        Keyword argument:
+        values -- Iterable of isbn strings
+    '''
+    values = list(values)
+    keys = {value: canonical(value) for value in set(values)}
+    return [keys[value] for value in values]
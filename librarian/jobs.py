@@ -0,0 +1,103 @@
+''' Database backed queue of google imports.
+    books_import view enqueues jobs, run_import_worker command runs them.
+'''
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+import json
+import logging
+from librarian.conf import setting
+from librarian.models import ImportJob
+from . import helpers
+
+logger = logging.getLogger(__name__)
+
+
+def jobs_enqueue(ids):
+    ''' Return queued ImportJob for provided google volume ids.
+
+        Keyword argument:
+        ids -- List of google volume ids
+    '''
+    ids = list(dict.fromkeys(ids))
+    return ImportJob.objects.create(volume_ids=json.dumps(ids), total=len(ids))
+
+
+def jobs_claim():
+    ''' Return oldest queued ImportJob marked as running, None if there is
+        no job. Running job without heartbeat for
+        LIBRARIAN_IMPORT_JOB_TIMEOUT seconds belongs to dead worker
+        and is claimed again, jobs_run resumes it after processed volumes.
+        Conditional update makes claim safe for many workers,
+        SKIP LOCKED keeps them from waiting on each other where supported.
+    '''
+    now = timezone.now()
+    stale = now - timedelta(seconds=setting('IMPORT_JOB_TIMEOUT'))
+    with transaction.atomic():
+        jobs = ImportJob.objects.filter(
+            Q(status=ImportJob.QUEUED) |
+            Q(status=ImportJob.RUNNING, heartbeat_at__lt=stale) |
+            Q(status=ImportJob.RUNNING, heartbeat_at__isnull=True,
+              started_at__lt=stale)).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+        for job in jobs[:5]:
+            claimed = ImportJob.objects.filter(
+                pk=job.pk, status=job.status,
+                heartbeat_at=job.heartbeat_at).update(
+                status=ImportJob.RUNNING, started_at=now, heartbeat_at=now)
+            if claimed:
+                if job.status == ImportJob.RUNNING:
+                    logger.warning('Reclaimed stale import job %d', job.pk)
+                job.status = ImportJob.RUNNING
+                job.started_at = job.heartbeat_at = now
+                return job
+    return None
+
+
+def jobs_run(job, chunk_size=None):
+    ''' Import volumes of running job chunk by chunk, storing progress
+        after each chunk so it can be polled.
+
+        Keyword arguments:
+        job -- ImportJob claimed by jobs_claim
+        chunk_size -- volumes per chunk, LIBRARIAN_IMPORT_JOB_CHUNK_SIZE
+                      by default
+    '''
+    chunk_size = chunk_size or setting('IMPORT_JOB_CHUNK_SIZE')
+    ids = json.loads(job.volume_ids)
+    try:
+        # Reclaimed job continues after last stored chunk.
+        for start in range(job.processed, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            results = helpers.books_google_import_ids(chunk)
+            saved = sum(1 for result in results if result['saved'])
+            job.processed += len(chunk)
+            job.saved += saved
+            job.failed += len(chunk) - saved
+            job.heartbeat_at = timezone.now()
+            job.save(update_fields=[
+                'processed', 'saved', 'failed', 'heartbeat_at'])
+        job.status = ImportJob.DONE
+    except Exception as error:
+        logger.exception('Import job %d failed', job.pk)
+        job.status = ImportJob.FAILED
+        job.error = str(error)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
+
+
+def jobs_status(job):
+    ''' Return Dict describing progress of job. '''
+    return {
+        'id': job.pk,
+        'status': job.status,
+        'total': job.total,
+        'processed': job.processed,
+        'saved': job.saved,
+        'failed': job.failed,
+        'error': job.error,
+        'finished': job.status in (ImportJob.DONE, ImportJob.FAILED),
+    }
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+import httpx
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from librarian import google_async
+from librarian import google_client
+
+
+def fake_volume(number):
+    return {
+        'id': 'bench%d' % number,
+        'volumeInfo': {
+            'title': 'Benchmark volume %d' % number,
+            'authors': ['Bench Author'],
+            'publishedDate': '2000-01-01',
+            'industryIdentifiers': [
+                {'type': 'ISBN_13', 'identifier': '978%010d' % number}],
+            'pageCount': 100 + number,
+            'language': 'en',
+        },
+    }
+
+
+class FakeGoogleHandler(BaseHTTPRequestHandler):
+    ''' Answers every request with search results after fixed latency. '''
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        body = json.dumps({
+            'totalItems': self.server.volumes,
+            'items': [fake_volume(i) for i in range(self.server.volumes)],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput of google search through synchronous ' \
+           'books_import (WSGI) and books_import_async (ASGI) views ' \
+           'against local fake google api with fixed latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Searches sent to each view.')
+        parser.add_argument(
+            '--concurrency', type=int, default=20,
+            help='Clients sending searches at the same time.')
+        parser.add_argument(
+            '--wsgi-threads', type=int, default=4,
+            help='Threads of single WSGI worker serving the clients.')
+        parser.add_argument(
+            '--latency', type=float, default=0.2,
+            help='Seconds fake google api waits before answering.')
+        parser.add_argument(
+            '--volumes', type=int, default=10,
+            help='Volumes in every search result.')
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGoogleHandler)
+        server.daemon_threads = True
+        server.latency = options['latency']
+        server.volumes = options['volumes']
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        api_url = google_client.API_URL
+        google_client.API_URL = 'http://127.0.0.1:%d/books/v1/volumes' % (
+            server.server_address[1])
+        # Unique queries keep google cache out of the measurement.
+        self.run_id = uuid.uuid4().hex
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                results = {
+                    'requests': options['requests'],
+                    'concurrency': options['concurrency'],
+                    'wsgi_threads': options['wsgi_threads'],
+                    'latency': options['latency'],
+                    'async_backend': 'httpx %s' % httpx.__version__,
+                    'wsgi': self.measure(self.run_wsgi, options),
+                    'asgi': self.measure(self.run_asgi, options),
+                }
+        finally:
+            google_client.API_URL = api_url
+            google_client.reset_session()
+            google_async.reset_clients()
+            server.shutdown()
+            server.server_close()
+
+        results['speedup'] = round(
+            results['asgi']['requests_per_second']
+            / results['wsgi']['requests_per_second'], 2)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def measure(self, run, options):
+        start = time.perf_counter()
+        statuses = run(options)
+        seconds = time.perf_counter() - start
+        return {
+            'seconds': round(seconds, 3),
+            'requests_per_second': round(len(statuses) / seconds, 2),
+            'errors': sum(1 for status in statuses if status != 200),
+        }
+
+    def search(self, mode, number):
+        return {'search': '%s %s %d' % (self.run_id, mode, number)}
+
+    def run_wsgi(self, options):
+        ''' Blocking view holds a thread for the whole google round trip,
+            so clients over wsgi_threads wait in queue.
+        '''
+        url = reverse('books_import')
+        threads = min(options['wsgi_threads'], options['concurrency'])
+
+        def post(number):
+            return Client().post(url, self.search('wsgi', number)).status_code
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(post, range(options['requests'])))
+
+    def run_asgi(self, options):
+        ''' Single event loop serves all concurrent clients. '''
+        url = reverse('books_import_async')
+
+        async def run():
+            semaphore = asyncio.Semaphore(options['concurrency'])
+            client = AsyncClient()
+
+            async def post(number):
+                async with semaphore:
+                    response = await client.post(
+                        url, urlencode(self.search('asgi', number)),
+                        content_type='application/x-www-form-urlencoded')
+                    return response.status_code
+
+            return await asyncio.gather(
+                *map(post, range(options['requests'])))
+
+        return asyncio.run(run())
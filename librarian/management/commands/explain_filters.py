@@ -0,0 +1,72 @@
+from itertools import combinations
+import re
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from librarian.models import Book
+from librarian import helpers
+
+full_scan_patterns = {
+    'mysql': re.compile(r'"access_type": "ALL"'),
+    'sqlite': re.compile(r'\bSCAN\b(?! .* USING (COVERING )?INDEX)'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Print EXPLAIN of every combination of registered book filters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--value', action='append', default=[], metavar='FILTER=VALUE',
+            help='Sample value used for filter, '
+                 'by default taken from the first book.')
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Fail if any combination falls back to full table scan.')
+
+    def handle(self, *args, **options):
+        values = self.sample_values()
+        for option in options['value']:
+            field, _, value = option.partition('=')
+            if field not in helpers.book_filters:
+                raise CommandError('Unknown filter "%s"' % field)
+            values[field] = value
+
+        pattern = full_scan_patterns.get(connection.vendor)
+        explain_options = {}
+        if connection.vendor == 'mysql':
+            explain_options['format'] = 'json'
+
+        scans = []
+        fields = list(helpers.book_filters)
+        for size in range(1, len(fields) + 1):
+            for combination in combinations(fields, size):
+                filters = {field: values[field] for field in combination}
+                books = helpers.books_filter(Book.objects.all(), filters)
+                plan = books.explain(**explain_options)
+                name = ', '.join(combination)
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(plan)
+                if pattern and pattern.search(plan):
+                    scans.append(name)
+                    self.stdout.write(self.style.WARNING('Full table scan'))
+
+        if options['check'] and scans:
+            raise CommandError(
+                'Full table scan in: %s' % '; '.join(scans))
+
+    def sample_values(self):
+        ''' Return Dict of filter: value based on first book in database. '''
+        book = Book.objects.order_by('id').first()
+        if not book:
+            return {
+                'author': 'Author', 'title': 'Title', 'language': 'en',
+                'publication_from': '2000-01-01',
+                'publication_to': '2010-01-01'}
+
+        return {
+            'author': book.author,
+            'title': book.title.split(' ')[0],
+            'language': book.language,
+            'publication_from': book.publication_date,
+            'publication_to': book.publication_date,
+        }
@@ -0,0 +1,98 @@
+import csv
+import gzip
+import json
+import sys
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from librarian.conf import setting
+from librarian.models import Book
+from librarian import helpers
+
+
+class Command(BaseCommand):
+    help = 'Export books to JSONL or CSV file, optionally gzipped.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Output file, standard output by default.')
+        parser.add_argument(
+            '--format', choices=['jsonl', 'csv'], default='jsonl')
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Compress output, implied by .gz extension.')
+        parser.add_argument(
+            '--since-id', type=int, default=0,
+            help='Export only books with greater id.')
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help='Rows fetched from database at once.')
+        for field in helpers.book_filters:
+            parser.add_argument(
+                '--' + field.replace('_', '-'), dest=field,
+                help='Same as "%s" filter of books_rest.' % field)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        compress = options['gzip'] or path.endswith('.gz')
+        chunk_size = options['chunk_size'] or setting('REST_STREAM_CHUNK_SIZE')
+        filters = {
+            field: options[field] for field in helpers.book_filters
+            if options[field]}
+
+        books = helpers.books_filter(Book.objects.all(), filters)
+        books = books.filter(id__gt=options['since_id'])
+
+        if path == '-':
+            stream = sys.stdout.buffer if compress else self.stdout
+            if compress:
+                stream = gzip.open(stream, 'wt', encoding='utf-8')
+        elif compress:
+            stream = gzip.open(path, 'wt', encoding='utf-8', newline='')
+        else:
+            stream = open(path, 'w', encoding='utf-8', newline='')
+
+        try:
+            count, last_id = self.export(
+                books, stream, options['format'], chunk_size)
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+
+        self.stderr.write(
+            'Exported %d books, last id %s' % (count, last_id))
+
+    def rows(self, books, chunk_size):
+        ''' Yield Dict of book values, walking table in id ordered chunks,
+            so memory does not depend on table size on any database.
+        '''
+        last_id = 0
+        while True:
+            chunk = books.filter(id__gt=last_id).order_by('id')
+            chunk = chunk.values('id', *helpers.book_columns)[:chunk_size]
+            count = 0
+            for row in chunk.iterator(chunk_size=chunk_size):
+                count += 1
+                last_id = row['id']
+                yield row
+            if count < chunk_size:
+                return
+
+    def export(self, books, stream, file_format, chunk_size):
+        columns = ('id',) + helpers.book_columns
+        if file_format == 'csv':
+            writer = csv.DictWriter(stream, fieldnames=columns)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(row):
+                stream.write(json.dumps(
+                    row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+
+        count = 0
+        last_id = None
+        for row in self.rows(books, chunk_size):
+            write(row)
+            count += 1
+            last_id = row['id']
+        return count, last_id
@@ -0,0 +1,119 @@
+import csv
+import gzip
+import json
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from librarian.conf import setting
+from librarian.models import Book
+from librarian import helpers
+from librarian import validators
+
+
+class Command(BaseCommand):
+    help = 'Import books from JSONL (google volumes or exported books) ' \
+           'or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, may be gzipped.')
+        parser.add_argument(
+            '--format', choices=['jsonl', 'csv'],
+            help='File format, by default guessed from extension.')
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help='Records validated and inserted at once.')
+        parser.add_argument(
+            '--offset', type=int, default=0,
+            help='Skip given number of records, used to resume import.')
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Reject records with minor validation issues too.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or self.guess_format(path)
+        chunk_size = options['chunk_size'] or setting('IMPORT_BATCH_SIZE')
+        self.strict = options['strict']
+        self.counts = {'imported': 0, 'duplicates': 0, 'invalid': 0}
+
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8', newline='') as stream:
+            records = self.read(stream, file_format)
+            records = islice(records, options['offset'], None)
+            offset = options['offset']
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                self.import_chunk(chunk)
+                offset += len(chunk)
+                self.stdout.write(
+                    'offset %(offset)d: imported %(imported)d, '
+                    'duplicates %(duplicates)d, invalid %(invalid)d'
+                    % dict(self.counts, offset=offset))
+
+        self.stdout.write(self.style.SUCCESS(
+            'Done, imported %d books' % self.counts['imported']))
+
+    def guess_format(self, path):
+        name = path[:-3] if path.endswith('.gz') else path
+        if name.endswith('.csv'):
+            return 'csv'
+        if name.endswith(('.jsonl', '.json')):
+            return 'jsonl'
+        raise CommandError('Unknown format of "%s", use --format' % path)
+
+    def read(self, stream, file_format):
+        ''' Yield Book or None for every record of stream. '''
+        if file_format == 'csv':
+            for row in csv.DictReader(stream):
+                yield self.book(row)
+        else:
+            for line in stream:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    if 'volumeInfo' in record:
+                        yield helpers.books_google_get_book(record)['book']
+                    else:
+                        yield self.book(record)
+                except (ValueError, TypeError, AttributeError):
+                    yield None
+
+    def book(self, row):
+        ''' Return Book from Dict of columns, as written by export_books. '''
+        return Book(**{
+            field: row.get(field) or '' for field in helpers.book_columns})
+
+    def valid(self, code):
+        return code is None or (
+            not self.strict and code == validators.MINOR)
+
+    def import_chunk(self, chunk):
+        self.counts['invalid'] += chunk.count(None)
+        chunk = [book for book in chunk if book is not None]
+        codes = validators.validate_books(chunk, duplicates=False)
+
+        books = []
+        seen = set()
+        for book, code in zip(chunk, codes):
+            if not self.valid(code):
+                self.counts['invalid'] += 1
+            elif validators.duplicate_key(book.isbn, book.title) in seen:
+                self.counts['duplicates'] += 1
+            else:
+                seen.add(validators.duplicate_key(book.isbn, book.title))
+                books.append(book)
+
+        duplicates = validators.find_duplicates(books)
+        self.counts['duplicates'] += len(duplicates)
+        books = [
+            book for index, book in enumerate(books)
+            if index not in duplicates]
+
+        # Formats were checked by validate_books above.
+        for result in helpers.books_bulk_save(books, validated=True):
+            if result['saved']:
+                self.counts['imported'] += 1
+            else:
+                self.counts['invalid'] += 1
@@ -0,0 +1,56 @@
+import json
+import sys
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, teardown_databases
+from django.test.utils import setup_test_environment
+from django.test.utils import teardown_test_environment
+from librarian import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Time librarian scenarios on synthetic catalogue stored ' \
+           'in a test database and print results as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--books', type=int, default=10000,
+            help='Number of generated books.')
+        parser.add_argument(
+            '--volumes', type=int, default=1000,
+            help='Number of generated google volumes.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Measured runs of every case.')
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            choices=list(benchmarks.scenarios),
+            help='Scenario to run, may be repeated, all by default.')
+        parser.add_argument(
+            '--output', default='-',
+            help='File for JSON results, standard output by default.')
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Keep test database between runs.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        databases = setup_databases(
+            verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            results = benchmarks.run_benchmarks(
+                count=options['books'], seed=options['seed'],
+                repeat=options['repeat'], names=options['scenarios'],
+                volumes=options['volumes'])
+        finally:
+            teardown_databases(
+                databases, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        output = json.dumps(results, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            with open(options['output'], 'w') as stream:
+                stream.write(output + '\n')
+            sys.stderr.write('Results written to %s\n' % options['output'])
@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from librarian.conf import setting
+from librarian import jobs
+
+
+class Command(BaseCommand):
+    help = 'Process queued google import jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when the queue is empty instead of waiting.')
+        parser.add_argument(
+            '--sleep', type=float,
+            help='Seconds to wait between polls of empty queue.')
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help='Volumes fetched and saved between progress updates.')
+
+    def handle(self, *args, **options):
+        sleep = options['sleep'] or setting('IMPORT_WORKER_SLEEP')
+        try:
+            while True:
+                close_old_connections()
+                job = jobs.jobs_claim()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(sleep)
+                    continue
+                jobs.jobs_run(job, options['chunk_size'])
+                self.stdout.write(
+                    'job %(id)d %(status)s: saved %(saved)d, '
+                    'failed %(failed)d of %(total)d' % jobs.jobs_status(job))
+        except KeyboardInterrupt:
+            pass
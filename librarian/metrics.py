@@ -0,0 +1,220 @@
+''' In-process metrics exposed in Prometheus text format by /metrics.
+    Every metric guards its values with own lock, so it can be updated
+    from threads of multi-threaded WSGI workers. Each worker process
+    keeps its own registry.
+'''
+from bisect import bisect_left
+import threading
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace('\\', r'\\').replace('"', r'\"')
+        pairs.append('%s="%s"' % (name, value.replace('\n', r'\n')))
+    return '{%s}' % ','.join(pairs)
+
+
+class Metric:
+    ''' Base of registered metrics.
+
+        Keyword arguments:
+        name -- metric name, counters end with _total
+        documentation -- HELP line
+        labelnames -- names of labels passed as keyword arguments
+    '''
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        ''' Yield (name, labels, value) of every sample. '''
+        with self.lock:
+            values = dict(self.values)
+        for key, value in sorted(values.items()):
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+    def expose(self):
+        lines = [
+            '# HELP %s %s' % (self.name, self.documentation),
+            '# TYPE %s %s' % (self.name, self.kind)]
+        for name, labels, value in self.samples():
+            lines.append('%s%s %s' % (
+                name, format_labels(labels), format_value(value)))
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    ''' Cumulative histogram with fixed upper bounds of buckets. '''
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                # bucket counts, sum, count
+                counts = self.values[key] = [[0] * len(self.buckets), 0, 0]
+            counts[0][index] += 1
+            counts[1] += value
+            counts[2] += 1
+
+    def samples(self):
+        with self.lock:
+            values = {
+                key: (list(buckets), total, count)
+                for key, (buckets, total, count) in self.values.items()}
+        for key, (buckets, total, count) in sorted(values.items()):
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, buckets):
+                cumulative += bucket
+                yield (
+                    self.name + '_bucket',
+                    labels + (('le', format_value(bound)),), cumulative)
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, count
+
+
+class CallbackMetric(Metric):
+    ''' Metric read at scrape time from function returning
+        List of (Dict of labels, value).
+    '''
+
+    def __init__(self, name, documentation, kind, callback):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.callback = callback
+
+    def samples(self):
+        for labels, value in self.callback():
+            yield self.name, tuple(sorted(labels.items())), value
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics[metric.name] = metric
+        return metric
+
+    def expose(self):
+        ''' Return all metrics in Prometheus text exposition format. '''
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return '\n'.join(metric.expose() for metric in metrics) + '\n'
+
+
+registry = Registry()
+
+request_seconds = registry.register(Histogram(
+    'librarian_request_duration_seconds',
+    'Time until response is returned, by URL name.', ['view']))
+requests_total = registry.register(Counter(
+    'librarian_requests_total',
+    'Responses by URL name and status class i.e. 5xx.', ['view', 'status']))
+request_queries = registry.register(Histogram(
+    'librarian_request_db_queries',
+    'SQL queries per request, by URL name.', ['view'], QUERY_BUCKETS))
+db_query_seconds = registry.register(Histogram(
+    'librarian_db_query_duration_seconds', 'SQL query time.'))
+google_seconds = registry.register(Histogram(
+    'librarian_google_request_duration_seconds',
+    'Google api request time including retries.'))
+template_seconds = registry.register(Histogram(
+    'librarian_template_render_duration_seconds', 'Template render time.'))
+imported_books = registry.register(Counter(
+    'librarian_imported_books_total',
+    'Books passed to bulk save, by result.', ['result']))
+import_seconds = registry.register(Counter(
+    'librarian_import_duration_seconds_total',
+    'Time spent in bulk saves, rate of imported books divided '
+    'by its rate gives books per second.'))
+
+# Histograms fed by instrumentation.record by operation name.
+operations = {
+    'db': db_query_seconds,
+    'google': google_seconds,
+    'template': template_seconds,
+}
+
+
+def observe_operation(name, seconds):
+    histogram = operations.get(name)
+    if histogram is not None:
+        histogram.observe(seconds)
+
+
+# Name: function returning Dict with 'hits' and 'misses' of cache.
+caches = {}
+
+
+def register_cache(name, stats):
+    ''' Expose hits, misses and hit ratio of cache.
+
+        Keyword arguments:
+        name -- value of cache label
+        stats -- function returning Dict with 'hits' and 'misses'
+    '''
+    caches[name] = stats
+
+
+def cache_samples(read):
+    return [
+        ({'cache': name}, read(stats()))
+        for name, stats in sorted(caches.items())]
+
+
+def hit_ratio(stats):
+    lookups = stats['hits'] + stats['misses']
+    return stats['hits'] / lookups if lookups else 0.0
+
+
+registry.register(CallbackMetric(
+    'librarian_cache_hits_total', 'Cache hits.', 'counter',
+    lambda: cache_samples(lambda stats: stats['hits'])))
+registry.register(CallbackMetric(
+    'librarian_cache_misses_total', 'Cache misses.', 'counter',
+    lambda: cache_samples(lambda stats: stats['misses'])))
+registry.register(CallbackMetric(
+    'librarian_cache_hit_ratio', 'Cache hits per lookup since start.',
+    'gauge', lambda: cache_samples(hit_ratio)))
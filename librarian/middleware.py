@@ -0,0 +1,146 @@
+from django.core.exceptions import MiddlewareNotUsed
+import asyncio
+import json
+import logging
+import time
+from librarian.conf import setting
+from . import instrumentation
+from . import metrics as registry
+
+try:
+    from asgiref.sync import markcoroutinefunction
+except ImportError:  # asgiref < 3.6
+    def markcoroutinefunction(function):
+        function._is_coroutine = asyncio.coroutines._is_coroutine
+        return function
+
+logger = logging.getLogger('librarian.performance')
+
+
+class MeasuringMiddleware:
+    ''' Base of middlewares measuring requests into RequestMetrics.
+        Works in sync and async chains, so it does not force ASGI
+        requests through a single thread.
+        Subclasses name enabling setting and implement measured.
+    '''
+    sync_capable = True
+    async_capable = True
+    enabled_by = None
+
+    def __init__(self, get_response):
+        if not setting(self.enabled_by):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = asyncio.iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = instrumentation.request_metrics(request)
+        start = time.perf_counter()
+        with instrumentation.collecting(metrics):
+            response = self.get_response(request)
+        return self.measured(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = instrumentation.request_metrics(request)
+        start = time.perf_counter()
+        with instrumentation.collecting(metrics):
+            response = await self.get_response(request)
+        return self.measured(request, response, metrics, start)
+
+    def measured(self, request, response, metrics, start):
+        ''' Return response of request measured since start. '''
+        raise NotImplementedError
+
+
+class PerformanceMiddleware(MeasuringMiddleware):
+    ''' Measures wall time, SQL queries, google api calls, template
+        rendering and response size of every request.
+        Numbers are sent in Server-Timing header and logged as JSON
+        to librarian.performance logger.
+        Opt-in, enabled by LIBRARIAN_PERFORMANCE setting. Template time
+        needs librarian.instrumentation.InstrumentedDjangoTemplates backend.
+    '''
+    enabled_by = 'PERFORMANCE'
+
+    def measured(self, request, response, metrics, start):
+        wall = time.perf_counter() - start
+        response['Server-Timing'] = metrics.server_timing(wall)
+
+        if not response.streaming:
+            self.log(request, response, metrics, wall, len(response.content))
+        elif getattr(response, 'is_async', False):
+            response.streaming_content = self.stream_async(
+                request, response, response.streaming_content, metrics, start)
+        else:
+            response.streaming_content = self.stream(
+                request, response, response.streaming_content, metrics, start)
+        return response
+
+    def stream(self, request, response, content, metrics, start):
+        ''' Yield streamed content measuring its production,
+            log request when it is exhausted.
+        '''
+        content = iter(content)
+        size = 0
+        while True:
+            with instrumentation.collecting(metrics):
+                chunk = next(content, None)
+            if chunk is None:
+                break
+            size += len(chunk)
+            yield chunk
+        self.log(request, response, metrics, time.perf_counter() - start, size)
+
+    async def stream_async(self, request, response, content, metrics, start):
+        ''' stream for async iterators of ASGI streaming responses. '''
+        content = content.__aiter__()
+        size = 0
+        while True:
+            with instrumentation.collecting(metrics):
+                try:
+                    chunk = await content.__anext__()
+                except StopAsyncIteration:
+                    break
+            size += len(chunk)
+            yield chunk
+        self.log(request, response, metrics, time.perf_counter() - start, size)
+
+    def log(self, request, response, metrics, wall, size):
+        match = request.resolver_match
+        with metrics.lock:
+            data = {
+                'view': match.url_name if match else None,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'wall_ms': round(wall * 1000, 1),
+                'size': size,
+            }
+            for name in ('db', 'google', 'template'):
+                data[name + '_count'] = metrics.counts[name]
+                data[name + '_ms'] = round(metrics.seconds[name] * 1000, 1)
+        logger.info(json.dumps(data), extra={'performance': data})
+
+
+class MetricsMiddleware(MeasuringMiddleware):
+    ''' Records latency, status class and SQL query count of requests
+        by URL name into librarian.metrics, served by /metrics.
+        Disabled by LIBRARIAN_METRICS = False.
+    '''
+    enabled_by = 'METRICS'
+
+    def measured(self, request, response, metrics, start):
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else 'unmatched'
+        registry.request_seconds.observe(
+            time.perf_counter() - start, view=view)
+        registry.requests_total.inc(
+            view=view, status='%dxx' % (response.status_code // 100))
+        with metrics.lock:
+            queries = metrics.counts['db']
+        registry.request_queries.observe(queries, view=view)
+        return response
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def create_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX book_title_fulltext '
+            'ON librarian_book (title)')
+
+
+def drop_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'DROP INDEX book_title_fulltext ON librarian_book')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('librarian', '0008_book_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext, drop_fulltext),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('librarian', '0011_book_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Author',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=60, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='authors',
+            field=models.ManyToManyField(blank=True, related_name='books', to='librarian.Author'),
+        ),
+    ]
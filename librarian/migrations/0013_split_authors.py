@@ -0,0 +1,41 @@
+from django.db import migrations
+
+CHUNK = 500
+
+
+def split_authors(apps, schema_editor):
+    Author = apps.get_model('librarian', 'Author')
+    Book = apps.get_model('librarian', 'Book')
+    through = Book.authors.through
+
+    ids = {}
+    links = []
+    books = Book.objects.values_list('id', 'author').order_by('id')
+    for book_id, author in books.iterator():
+        names = [name.strip() for name in author.split(',')]
+        for name in dict.fromkeys(name for name in names if name):
+            key = name.casefold()
+            if key not in ids:
+                ids[key] = Author.objects.create(name=name).id
+            links.append(through(book_id=book_id, author_id=ids[key]))
+        if len(links) >= CHUNK:
+            through.objects.bulk_create(links, ignore_conflicts=True)
+            links = []
+    through.objects.bulk_create(links, ignore_conflicts=True)
+
+
+def remove_authors(apps, schema_editor):
+    Book = apps.get_model('librarian', 'Book')
+    Book.authors.through.objects.all().delete()
+    apps.get_model('librarian', 'Author').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('librarian', '0012_author'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_authors, remove_authors),
+    ]
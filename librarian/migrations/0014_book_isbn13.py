@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('librarian', '0013_split_authors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='isbn13',
+            field=models.CharField(editable=False, max_length=13, null=True, unique=True),
+        ),
+    ]
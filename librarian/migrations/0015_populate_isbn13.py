@@ -0,0 +1,75 @@
+import re
+
+from django.db import migrations
+
+CHUNK = 500
+
+# Frozen copy of librarian.isbn conversion, migrations must not change
+# with application code.
+SEPARATORS = re.compile(r'[\s-]')
+ISBN10 = re.compile(r'\d{9}[\dX]')
+ISBN13 = re.compile(r'97[89]\d{10}')
+
+
+def check_digit10(digits):
+    total = sum(
+        int(digit) * weight
+        for digit, weight in zip(digits[:9], range(10, 1, -1)))
+    digit = (11 - total % 11) % 11
+    return 'X' if digit == 10 else str(digit)
+
+
+def check_digit13(digits):
+    total = sum(
+        int(digit) * (3 if position % 2 else 1)
+        for position, digit in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def to_isbn13(value):
+    ''' Return ISBN-13 form of valid ISBN-10 or ISBN-13, None if value
+        is not a valid ISBN or is a placeholder made of zeros.
+    '''
+    value = SEPARATORS.sub('', value or '').upper()
+    if not value.strip('0'):
+        return None
+    if ISBN13.fullmatch(value) and check_digit13(value) == value[12]:
+        return value
+    if ISBN10.fullmatch(value) and check_digit10(value) == value[9]:
+        core = '978' + value[:9]
+        return core + check_digit13(core)
+    return None
+
+
+def populate_isbn13(apps, schema_editor):
+    ''' Fill isbn13, oldest book keeps the key when isbns collide. '''
+    Book = apps.get_model('librarian', 'Book')
+    seen = set()
+    pending = []
+    books = Book.objects.only('id', 'isbn').order_by('id')
+    for book in books.iterator():
+        key = to_isbn13(book.isbn)
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+        book.isbn13 = key
+        pending.append(book)
+        if len(pending) >= CHUNK:
+            Book.objects.bulk_update(pending, ['isbn13'])
+            pending = []
+    Book.objects.bulk_update(pending, ['isbn13'])
+
+
+def clear_isbn13(apps, schema_editor):
+    apps.get_model('librarian', 'Book').objects.update(isbn13=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('librarian', '0014_book_isbn13'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_isbn13, clear_isbn13),
+    ]
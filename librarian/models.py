@@ -1,7 +1,9 @@
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django.db import models
+from django.utils import timezone
 from . import validators
+from . import isbn as isbn_tools
 
 AUTHOR_MAX = 60
 TITLE_MAX = 200
@@ -10,14 +12,77 @@ LINK_MAX = 300
 LANGUAGE_MAX = 2
 
 
+def split_authors(author):
+    ''' Return List of distinct names from comma separated author string. '''
+    names = [name.strip() for name in author.split(',')]
+    return list(dict.fromkeys(name for name in names if name))
+
+
+class Author(models.Model):
+    name = models.CharField(max_length=AUTHOR_MAX, unique=True)
+
+
 class Book(models.Model):
     title = models.CharField(max_length=TITLE_MAX)
     author = models.CharField(max_length=AUTHOR_MAX)
+    authors = models.ManyToManyField(
+        Author, related_name='books', blank=True)
     publication_date = models.DateField()
     isbn = models.CharField(max_length=ISBN_MAX)
+    isbn13 = models.CharField(
+        max_length=13, unique=True, null=True, editable=False)
     page_count = models.IntegerField()
     cover_link = models.CharField(max_length=LINK_MAX)
     language = models.CharField(max_length=LANGUAGE_MAX)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['title'], name='book_title_idx'),
+            models.Index(
+                fields=['publication_date'], name='book_publication_idx'),
+            models.Index(
+                fields=['language', 'publication_date'],
+                name='book_language_publication_idx'),
+            models.Index(
+                fields=['author', 'publication_date'],
+                name='book_author_publication_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember values loaded from database, signal receivers
+        # use them to find out what changed on save.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.set_isbn13()
+        elif self.isbn_changed():
+            # Stored row keeps NULL key, when other book already has it,
+            # like legacy duplicates left by migration 0015.
+            if self.set_isbn13() and Book.objects.filter(
+                    isbn13=self.isbn13).exclude(pk=self.pk).exists():
+                self.isbn13 = None
+        super().save(*args, **kwargs)
+        loaded = getattr(self, '_loaded_values', None) or {}
+        self._loaded_values = dict(loaded, isbn=self.isbn)
+
+    def isbn_changed(self):
+        ''' Return True unless isbn equals the one loaded from database. '''
+        loaded = getattr(self, '_loaded_values', None) or {}
+        return 'isbn' not in loaded or loaded['isbn'] != self.isbn
+
+    def set_isbn13(self):
+        ''' Set unique isbn13 key from isbn, None if isbn is invalid. '''
+        self.isbn13 = isbn_tools.canonical(self.isbn)
+        return self.isbn13
+
+    def author_names(self):
+        ''' Return List of names stored in comma separated author. '''
+        return split_authors(self.author)
 
     def clean(self):
         try:
@@ -33,11 +98,60 @@ class Book(models.Model):
         validators.check_link(self.cover_link)
 
     def set_best_isbn(self, candidates):
+        ''' Set isbn to valid ISBN-13, or converted valid ISBN-10,
+            otherwise fall back to the longest candidate of ISBN length.
+        '''
         best_candidate = "0000000000"
-        for length in [10, 13]:
-            for isbn in candidates:
-                if len(isbn) == length:
-                    best_candidate = isbn
+        for key in isbn_tools.canonical_many(candidates):
+            if key:
+                best_candidate = key
+                break
+        else:
+            for length in [10, 13]:
+                for isbn in candidates:
+                    if len(isbn) == length:
+                        best_candidate = isbn
 
         self.isbn = best_candidate
         return best_candidate
+
+
+class CatalogueVersion(models.Model):
+    ''' Single row bumped on every change of books,
+        identifies state of whole catalogue.
+    '''
+    generation = models.BigIntegerField(default=0)
+    modified = models.DateTimeField(default=timezone.now)
+
+
+class ImportJob(models.Model):
+    ''' Google volumes import queued by books_import view
+        and processed by run_import_worker command.
+    '''
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, _('Queued')), (RUNNING, _('Running')),
+        (DONE, _('Done')), (FAILED, _('Failed'))]
+
+    status = models.CharField(max_length=7, choices=STATUSES, default=QUEUED)
+    # JSON List of google volume ids
+    volume_ids = models.TextField()
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    saved = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True)
+    # Updated by worker after every chunk, stale running job is reclaimed.
+    heartbeat_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'id'], name='importjob_status_idx'),
+        ]
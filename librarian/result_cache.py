@@ -0,0 +1,60 @@
+''' In-process LRU cache with hit and miss counters. '''
+from collections import OrderedDict
+import threading
+from librarian.conf import setting
+from . import metrics
+
+
+class ResultCache:
+    ''' Thread safe mapping keeping at most max_entries recently used
+        values. max_entries may be callable, so it follows settings.
+    '''
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        max_entries = self.max_entries
+        if callable(max_entries):
+            max_entries = max_entries()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        ''' Return Dict with size and counters of cache. '''
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Ids of books matching filter sets, see helpers.books_filter_ids.
+filter_cache = ResultCache(lambda: setting('FILTER_CACHE_SIZE'))
+metrics.register_cache('filter', filter_cache.stats)
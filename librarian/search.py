@@ -0,0 +1,277 @@
+''' Title search backends used by books_filter instead of title__icontains.
+
+    MySQLFullTextBackend uses FULLTEXT index on Book.title,
+    InvertedIndexBackend keeps in-process token: book ids index
+    and is meant for SQLite, development and tests.
+'''
+from bisect import bisect_left, insort
+import re
+import threading
+from django.db import connection
+from django.db.models import Case, FloatField, IntegerField, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from librarian.conf import setting
+from librarian.models import Book
+from . import catalogue
+
+TOKEN = re.compile(r'\w+')
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def tokenize(text):
+    ''' Return List of lowercase word tokens found in text. '''
+    return TOKEN.findall(text.casefold())
+
+
+class BaseSearchBackend:
+    def filter(self, books, query):
+        ''' Return QuerySet of books which title matches query. '''
+        raise NotImplementedError
+
+    def rank(self, books, query):
+        ''' Return QuerySet ordered by relevance of title to query. '''
+        raise NotImplementedError
+
+    def book_saved(self, book):
+        pass
+
+    def book_deleted(self, book):
+        pass
+
+    def reset(self):
+        pass
+
+    def catalogue_bumped(self):
+        ''' Called after catalogue.bump of changes passed to
+            book_saved and book_deleted.
+        '''
+        pass
+
+
+class MySQLFullTextBackend(BaseSearchBackend):
+    ''' Uses MATCH ... AGAINST in boolean mode, every query token
+        is required and matched as a prefix.
+    '''
+
+    def terms(self, query):
+        min_length = setting('SEARCH_MIN_TOKEN')
+        return ' '.join(
+            '+%s*' % token for token in tokenize(query)
+            if len(token) >= min_length)
+
+    def relevance(self, terms):
+        column = '%s.%s' % (
+            connection.ops.quote_name(Book._meta.db_table),
+            connection.ops.quote_name('title'))
+        return RawSQL(
+            'MATCH (%s) AGAINST (%%s IN BOOLEAN MODE)' % column,
+            (terms,), output_field=FloatField())
+
+    def filter(self, books, query):
+        terms = self.terms(query)
+        if not terms:
+            return books.filter(title__icontains=query)
+        return books.annotate(
+            relevance=self.relevance(terms)).filter(relevance__gt=0)
+
+    def rank(self, books, query):
+        terms = self.terms(query)
+        if not terms:
+            return books
+        return books.annotate(
+            relevance=self.relevance(terms)).order_by('-relevance', 'id')
+
+
+class InvertedIndexBackend(BaseSearchBackend):
+    ''' In-process token: book ids index, built lazily on first search
+        and updated by Book signals. Query tokens are matched as prefixes
+        of title tokens, all of them are required.
+        Index remembers catalogue generation it reflects and is rebuilt
+        when other process changed catalogue. Queries matching more than
+        LIBRARIAN_SEARCH_MAX_CANDIDATES books are filtered by database
+        with the same token prefix rule.
+    '''
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.built = False
+            self.generation = None
+            self.index = {}
+            self.tokens = []
+            self.titles = {}
+
+    def build(self):
+        ''' Build index unless it reflects current catalogue generation. '''
+        generation, _ = catalogue.version()
+        with self.lock:
+            if self.built and self.generation == generation:
+                return
+            self.reset()
+            # Version is read first, changes made during scan
+            # only cause another rebuild.
+            books = Book.objects.values_list('id', 'title')
+            for id, title in books.iterator():
+                self.add(id, title)
+            self.built = True
+            self.generation = generation
+
+    def add(self, id, title):
+        tokens = set(tokenize(title))
+        self.titles[id] = tokens
+        for token in tokens:
+            if token not in self.index:
+                self.index[token] = set()
+                insort(self.tokens, token)
+            self.index[token].add(id)
+
+    def remove(self, id):
+        for token in self.titles.pop(id, ()):
+            ids = self.index[token]
+            ids.discard(id)
+            if not ids:
+                del self.index[token]
+                del self.tokens[bisect_left(self.tokens, token)]
+
+    def book_saved(self, book):
+        with self.lock:
+            if self.built:
+                self.remove(book.id)
+                self.add(book.id, book.title)
+
+    def book_deleted(self, book):
+        with self.lock:
+            if self.built:
+                self.remove(book.id)
+
+    def catalogue_bumped(self):
+        # Own changes are already applied, bump by other process
+        # in meantime leaves generations different.
+        with self.lock:
+            if self.built:
+                self.generation += 1
+
+    def lookup(self, token):
+        ''' Return Dict of id: True if token matched exactly,
+            False if only as prefix.
+        '''
+        matches = {}
+        position = bisect_left(self.tokens, token)
+        while position < len(self.tokens):
+            candidate = self.tokens[position]
+            if not candidate.startswith(token):
+                break
+            exact = candidate == token
+            for id in self.index[candidate]:
+                matches[id] = matches.get(id, False) or exact
+            position += 1
+        return matches
+
+    def scores(self, query):
+        ''' Return Dict of id: number of exactly matched tokens,
+            only for books matching every token of query.
+        '''
+        self.build()
+        scores = None
+        with self.lock:
+            for token in tokenize(query):
+                matches = self.lookup(token)
+                if scores is None:
+                    scores = {id: int(exact) for id, exact in matches.items()}
+                else:
+                    scores = {
+                        id: score + int(matches[id])
+                        for id, score in scores.items() if id in matches}
+        return scores
+
+    def filter(self, books, query):
+        scores = self.scores(query)
+        if scores is None:
+            return books.filter(title__icontains=query)
+        if len(scores) > setting('SEARCH_MAX_CANDIDATES'):
+            # Long id list costs more than scanning titles.
+            for token in tokenize(query):
+                books = books.filter(title__iregex=r'\b' + re.escape(token))
+            return books
+
+        # Verify candidates in database, index may hold ids
+        # of rows which disappeared without signal i.e. on rollback.
+        books = books.filter(id__in=list(scores))
+        for token in tokenize(query):
+            books = books.filter(title__icontains=token)
+        return books
+
+    def rank(self, books, query):
+        scores = self.scores(query)
+        if not scores:
+            return books
+
+        groups = {}
+        for id, score in scores.items():
+            groups.setdefault(score, []).append(id)
+        # Only best groups up to LIBRARIAN_SEARCH_MAX_CANDIDATES ids
+        # are sent to database, the rest get score 0.
+        whens = []
+        remaining = setting('SEARCH_MAX_CANDIDATES')
+        for score in sorted(groups, reverse=True):
+            ids = groups[score]
+            if len(ids) > remaining:
+                break
+            whens.append(When(id__in=ids, then=Value(score)))
+            remaining -= len(ids)
+        if not whens:
+            return books
+        relevance = Case(
+            *whens, default=Value(0), output_field=IntegerField())
+        return books.annotate(relevance=relevance).order_by('-relevance', 'id')
+
+
+def get_backend():
+    ''' Return process wide search backend instance.
+        Class is taken from LIBRARIAN_SEARCH_BACKEND or chosen by database.
+    '''
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = setting('SEARCH_BACKEND')
+            if path:
+                backend_class = import_string(path)
+            elif connection.vendor == 'mysql':
+                backend_class = MySQLFullTextBackend
+            else:
+                backend_class = InvertedIndexBackend
+            _backend = backend_class()
+        return _backend
+
+
+def reset_backend():
+    ''' Drop backend instance, next get_backend call creates new one. '''
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def books_search(books, query):
+    ''' Return QuerySet of books which title matches query.
+
+        Keyword arguments:
+        books -- QuerySet that should be filtered
+        query -- str with searched words
+    '''
+    return get_backend().filter(books, query)
+
+
+def books_rank(books, query):
+    ''' Return QuerySet ordered by relevance of title to query.
+
+        Keyword arguments:
+        books -- QuerySet that should be ordered
+        query -- str with searched words
+    '''
+    return get_backend().rank(books, query)
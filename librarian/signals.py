@@ -0,0 +1,86 @@
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver, Signal
+from librarian.models import Book
+from . import authors
+from . import catalogue
+from .autocomplete import suggestions, FIELDS
+from .result_cache import filter_cache
+from . import search
+from . import google_client
+from . import google_async
+from . import instrumentation
+
+# Sent after bulk upsert of books, which does not send post_save.
+# Arguments: books -- List of created or updated Book instances
+#            updated -- List of those which updated stored rows
+books_bulk_created = Signal()
+
+
+@receiver(post_save, sender=Book)
+def book_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_loaded_values', None)
+    if not previous or previous.get('author') != instance.author:
+        authors.books_link_authors([instance])
+
+    catalogue.bump()
+    filter_cache.clear()
+    backend = search.get_backend()
+    backend.book_saved(instance)
+    backend.catalogue_bumped()
+    suggestions.book_saved(instance, previous)
+    instance._loaded_values = {
+        field: getattr(instance, field) for field in FIELDS}
+
+
+@receiver(books_bulk_created)
+def books_created(sender, books, updated=(), **kwargs):
+    authors.books_link_authors(books)
+    catalogue.bump()
+    filter_cache.clear()
+    if updated:
+        # Previous values of updated rows are unknown, rebuild lazily.
+        suggestions.reset()
+    for book in books:
+        if not updated:
+            suggestions.book_saved(book)
+        book._loaded_values = {field: getattr(book, field) for field in FIELDS}
+
+    backend = search.get_backend()
+    if any(book.pk is None for book in books):
+        backend.reset()
+        return
+    for book in books:
+        backend.book_saved(book)
+    backend.catalogue_bumped()
+
+
+@receiver(post_delete, sender=Book)
+def book_deleted(sender, instance, **kwargs):
+    catalogue.bump()
+    filter_cache.clear()
+    backend = search.get_backend()
+    backend.book_deleted(instance)
+    backend.catalogue_bumped()
+    suggestions.book_deleted(
+        instance, getattr(instance, '_loaded_values', None))
+
+
+@receiver(post_migrate)
+def database_changed(sender, **kwargs):
+    filter_cache.clear()
+    suggestions.reset()
+    search.get_backend().reset()
+
+
+@receiver(setting_changed)
+def librarian_setting_changed(setting, **kwargs):
+    if setting == 'LIBRARIAN_SEARCH_BACKEND':
+        search.reset_backend()
+    elif setting.startswith('LIBRARIAN_GOOGLE_'):
+        google_client.reset_session()
+        google_async.reset_clients()
+
+
+connection_created.connect(instrumentation.install_query_wrapper)
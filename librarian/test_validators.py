@@ -1,4 +1,6 @@
 from librarian import validators
+from librarian import isbn
+from librarian.models import Book
 from django.core.exceptions import ValidationError
 import unittest
 
@@ -10,6 +12,24 @@ class ValidatorsTestCase(unittest.TestCase):
         self.assertTrue(validators.check_isbn, "0000000001")
         self.assertTrue(validators.check_isbn, "0000000001234")
 
+    def test_isbn_checksums(self):
+        self.assertEqual(isbn.to_isbn13('0-441-01359-7'), '9780441013593')
+        self.assertEqual(isbn.to_isbn10('9780441013593'), '0441013597')
+        self.assertEqual(isbn.to_isbn13('080442957x'), '9780804429573')
+        self.assertIsNone(isbn.to_isbn13('0441013598'))
+        self.assertIsNone(isbn.to_isbn13('9780441013594'))
+        self.assertIsNone(isbn.to_isbn10('9791034304019'))
+        self.assertEqual(
+            isbn.canonical_many(['0441013597', '', '0441013597']),
+            ['9780441013593', None, '9780441013593'])
+        self.assertRaises(
+            ValidationError, validators.check_isbn, "9780441013594")
+        self.assertTrue(validators.check_isbn("0441013597"))
+
+        book = Book()
+        book.set_best_isbn(['9780441013594', '0441013597'])
+        self.assertEqual(book.isbn, '9780441013593')
+
     def test_author(self):
         self.assertRaises(ValidationError, validators.check_author, "")
         self.assertTrue(validators.check_author, "Autor")
@@ -31,6 +51,33 @@ class ValidatorsTestCase(unittest.TestCase):
         self.assertTrue(
             validators.check_link, "https://books.google.pl/foto.jpg")
 
+    def test_validate_books(self):
+        def books():
+            base = {
+                'title': 'Title', 'author': 'Author',
+                'publication_date': '2001-02-03', 'isbn': '9780547951915',
+                'page_count': 100, 'cover_link': 'http://cover',
+                'language': 'en'}
+            changes = [
+                {}, {'isbn': '123'}, {'author': ''}, {'page_count': 0},
+                {'language': '1x'}, {'cover_link': 'ftp://cover'},
+                {'title': 'x' * 300}, {'publication_date': 'never'},
+                {'isbn': '123', 'title': ''}, {'page_count': '7'}]
+            return [Book(**dict(base, **change)) for change in changes]
+
+        expected = []
+        for book in books():
+            try:
+                book.clean()
+                expected.append(None)
+            except ValidationError as validation:
+                expected.append(validation.code)
+
+        batch = books()
+        self.assertEqual(
+            validators.validate_books(batch, duplicates=False), expected)
+        self.assertEqual(batch[9].page_count, 7)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,13 +1,44 @@
-from django.test import TransactionTestCase, Client
+from io import StringIO
+from unittest import mock
+import asyncio
+import json
+import os
+import tempfile
+import time
+import httpx
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+from urllib.parse import urlencode
+from asgiref.sync import async_to_sync
+from django.test import TransactionTestCase, Client, override_settings
+from django.test import AsyncClient, RequestFactory
+from django.http import HttpResponse
+from django.core.management import call_command
 from django.core import serializers
 from django.core.exceptions import ValidationError
-from librarian.models import Book
+from django.core.cache.backends.base import memcache_key_warnings
+from librarian.models import Book, Author, ImportJob
 from librarian.forms import BooksChangeForm
+from librarian.conf import setting
 from . import validators
 from . import helpers
+from . import search
+from . import google_client
+from . import google_cache
+from . import google_async
+from . import jobs
+from . import instrumentation
+from . import middleware
+from . import metrics
+from . import benchmarks
+from . import catalogue
+from .result_cache import filter_cache
+from .autocomplete import suggestions
 
 
 class BookTestCase(TransactionTestCase):
+    reset_sequences = True
 
     def setUp(self):
         Book.objects.create(
@@ -73,7 +104,7 @@ class BookTestCase(TransactionTestCase):
                     },
                     {
                         'type': "ISBN_13",
-                        'identifier': '9780544519789'
+                        'identifier': '9780544519787'
                     }
                 ],
                 'pageCount': '56',
@@ -268,3 +299,730 @@ class BookTestCase(TransactionTestCase):
         result = serializers.deserialize("json", response.content)
         data = eval(response.content.decode())
         self.assertEqual(data[0]['fields']['title'], 'John')
+        self.assertNotIn('authors', data[0]['fields'])
+
+        # Query count does not grow with number of books.
+        filter_cache.clear()
+        with self.assertNumQueries(3):
+            client.get('/books_rest/?limit=50')
+        with self.assertNumQueries(2):
+            response = client.get('/books_rest/?stream=true')
+            b''.join(response.streaming_content)
+
+    def test_rest_pagination(self):
+        client = Client()
+        response = client.get('/books_rest/?limit=3')
+        data = eval(response.content.decode())
+        self.assertEqual(len(data), 3)
+        self.assertIn('Link', response)
+
+        response = client.get(
+            '/books_rest/?limit=3&cursor=' + response['X-Next-Cursor'])
+        data = eval(response.content.decode())
+        self.assertEqual(len(data), 1)
+        self.assertNotIn('X-Next-Cursor', response)
+
+        response = client.get('/books_rest/?order=publication_date&limit=2')
+        data = eval(response.content.decode())
+        self.assertEqual(data[0]['fields']['title'], 'Kaliba')
+        self.assertEqual(data[1]['fields']['title'], 'Books')
+        response = client.get(
+            '/books_rest/?order=publication_date&limit=2&cursor=' +
+            response['X-Next-Cursor'])
+        data = eval(response.content.decode())
+        self.assertEqual(data[0]['fields']['title'], 'Marry')
+
+        response = client.get('/books_rest/?cursor=xxx')
+        self.assertEqual(response.status_code, 400)
+        response = client.get('/books_rest/?order=isbn')
+        self.assertEqual(response.status_code, 400)
+
+    def test_rest_stream(self):
+        client = Client()
+        response = client.get('/books_rest/?stream=true&language=pl')
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        expected = serializers.serialize(
+            'json', Book.objects.filter(language='pl'),
+            fields=helpers.book_rest_fields, ensure_ascii=False)
+        self.assertEqual(eval(content), eval(expected))
+
+        response = client.get('/books_rest/?stream=true')
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(eval(content)), 4)
+
+        # One keyset query per chunk, order kept across chunks.
+        with self.settings(LIBRARIAN_REST_STREAM_CHUNK_SIZE=2):
+            response = client.get('/books_rest/?stream=true&order=title')
+            with self.assertNumQueries(3):
+                content = b''.join(response.streaming_content).decode()
+        self.assertEqual(
+            [book['fields']['title'] for book in eval(content)],
+            list(Book.objects.order_by('title', 'id').values_list(
+                'title', flat=True)))
+
+    def test_explain_filters(self):
+        out = StringIO()
+        call_command('explain_filters', '--value', 'language=pl', stdout=out)
+        self.assertIn('language, publication_from', out.getvalue())
+
+    def test_search(self):
+        backend = search.InvertedIndexBackend()
+        books = Book.objects.all()
+        self.assertEqual(backend.filter(books, 'kal').get().title, 'Kaliba')
+        self.assertEqual(backend.filter(books, 'books kal').count(), 0)
+
+        Book.objects.create(
+            title="Kaliba Books", author="Muzyka",
+            publication_date="1990-05-20", isbn="9780547951977",
+            page_count=5, cover_link="https://books.google.com/books/",
+            language="en")
+        result = helpers.books_filter(books, {'title': 'Kaliba'})
+        self.assertEqual(result.count(), 2)
+        result = helpers.books_filter(books, {'title': 'Book'}, ranked=True)
+        self.assertEqual(
+            [book.title for book in result], ['Books', 'Kaliba Books'])
+        result = search.books_rank(books, 'Kaliba Books')
+        self.assertEqual(result[0].title, 'Kaliba Books')
+
+        Book.objects.filter(title="Kaliba").get().delete()
+        result = helpers.books_filter(books, {'title': 'Kaliba'})
+        self.assertEqual(result.get().title, 'Kaliba Books')
+
+        # Change made by other process, seen only through catalogue version.
+        Book.objects.filter(title="Books").update(title="Kaliban")
+        catalogue.bump()
+        self.assertEqual(backend.filter(books, 'kaliban').get().title,
+                         'Kaliban')
+        # Substring inside word matches neither below nor above the cap.
+        Book.objects.create(
+            title="Mikal", author="Muzyka",
+            publication_date="1990-05-20", isbn="9780547951984",
+            page_count=5, cover_link="https://books.google.com/books/",
+            language="en")
+        self.assertEqual(backend.filter(books, 'kal').count(), 2)
+        with override_settings(LIBRARIAN_SEARCH_MAX_CANDIDATES=1):
+            self.assertEqual(backend.filter(books, 'kal').count(), 2)
+            result = backend.rank(books, 'Kaliban')
+            self.assertEqual(result[0].title, 'Kaliban')
+
+    def test_google_import_concurrent(self):
+        def fetch(direct_id):
+            time.sleep(0.2)
+            if direct_id == 'broken':
+                raise requests.ConnectionError()
+            volume = dict(self.single_book, id=direct_id)
+            volume['volumeInfo'] = dict(
+                volume['volumeInfo'], title='Volume ' + direct_id,
+                industryIdentifiers=[{
+                    'type': 'ISBN_13',
+                    'identifier': '97805445197' + direct_id.zfill(2)}])
+            return volume
+
+        data = {'import%d' % i: str(i) for i in range(6)}
+        data['importbroken'] = 'broken'
+        with mock.patch.object(helpers, 'books_google_fetch', fetch):
+            start = time.monotonic()
+            self.assertTrue(helpers.books_google_import(data))
+            self.assertLess(time.monotonic() - start, 1)
+        volumes = Book.objects.filter(title__startswith='Volume')
+        self.assertEqual(volumes.count(), 6)
+
+    def test_import_jobs(self):
+        fetched = []
+
+        def fetch(direct_id):
+            fetched.append(direct_id)
+            if direct_id == 'broken':
+                raise requests.ConnectionError()
+            return dict(self.single_book, id=direct_id)
+
+        client = Client()
+        response = client.post(
+            '/books_import/', {'import1': 'a1', 'import2': 'broken'})
+        self.assertEqual(response.status_code, 302)
+        job = ImportJob.objects.get()
+        self.assertEqual(
+            response['Location'], '/books_import/?job=%d' % job.pk)
+        self.assertEqual(job.status, ImportJob.QUEUED)
+        self.assertEqual(Book.objects.count(), 4)
+
+        response = client.get(response['Location'])
+        self.assertEqual(response.context['job'], job)
+
+        out = StringIO()
+        with mock.patch.object(helpers, 'books_google_fetch', fetch):
+            call_command('run_import_worker', '--once', stdout=out)
+        self.assertIn('done: saved 1, failed 1 of 2', out.getvalue())
+        self.assertEqual(Book.objects.count(), 5)
+
+        status = client.get('/books_import/%d/status/' % job.pk).json()
+        self.assertEqual(status['processed'], 2)
+        self.assertTrue(status['finished'])
+        self.assertIsNone(jobs.jobs_claim())
+
+        # Worker died after first volume, job is resumed after timeout.
+        job = jobs.jobs_enqueue(['a1', 'a2'])
+        self.assertEqual(jobs.jobs_claim(), job)
+        ImportJob.objects.filter(pk=job.pk).update(processed=1, saved=1)
+        self.assertIsNone(jobs.jobs_claim())
+        with self.settings(LIBRARIAN_IMPORT_JOB_TIMEOUT=-1):
+            job = jobs.jobs_claim()
+        self.assertEqual(job.status, ImportJob.RUNNING)
+        fetched.clear()
+        with mock.patch.object(helpers, 'books_google_fetch', fetch):
+            jobs.jobs_run(job)
+        self.assertEqual(fetched, ['a2'])
+        self.assertEqual((job.status, job.processed), (ImportJob.DONE, 2))
+
+    def test_import_async(self):
+        async def fetch(search_data=None, direct_id=None):
+            await asyncio.sleep(0.2)
+            if search_data:
+                return self.multiple_books
+            return dict(self.single_book, id=direct_id)
+
+        @async_to_sync
+        async def post(data):
+            return await AsyncClient().post(
+                '/books_import_async/', urlencode(data),
+                content_type='application/x-www-form-urlencoded')
+
+        with mock.patch.object(helpers, 'books_google_fetch_async', fetch):
+            response = post({'search': 'ursa'})
+            self.assertEqual(len(response.context['books']), 3)
+
+            start = time.monotonic()
+            response = post({'import%d' % i: str(i) for i in range(5)})
+            self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Book.objects.filter(title='Ursa Major').count(), 1)
+
+        out = StringIO()
+        call_command(
+            'benchmark_import_views', '--requests', '4', '--concurrency', '2',
+            '--latency', '0', stdout=out, stderr=StringIO())
+        result = json.loads(out.getvalue())
+        self.assertEqual(result['wsgi']['errors'], 0)
+        self.assertEqual(result['asgi']['errors'], 0)
+        self.assertTrue(result['async_backend'].startswith('httpx'))
+
+    @override_settings(LIBRARIAN_PERFORMANCE=True)
+    def test_performance_middleware(self):
+        client = Client()
+        with self.assertLogs('librarian.performance') as logs:
+            response = client.get('/books_list/')
+        self.assertRegex(
+            response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+"')
+        self.assertIn('template;dur=', response['Server-Timing'])
+        data = json.loads(logs.records[0].getMessage())
+        self.assertEqual(data['view'], 'books_list')
+        self.assertGreater(data['db_count'], 0)
+        self.assertEqual(data['size'], len(response.content))
+
+        response = client.get('/books_rest/?stream=true')
+        with self.assertLogs('librarian.performance') as logs:
+            content = b''.join(response.streaming_content)
+        data = json.loads(logs.records[0].getMessage())
+        self.assertEqual(data['size'], len(content))
+        self.assertGreater(data['db_count'], 0)
+
+        async def view(request):
+            return HttpResponse(b'async')
+
+        async def chunks():
+            yield b'ab'
+            yield b'c'
+
+        performance = middleware.PerformanceMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(performance))
+        request = RequestFactory().get('/')
+        request.resolver_match = None
+        with self.assertLogs('librarian.performance') as logs:
+            response = async_to_sync(performance)(request)
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertEqual(json.loads(logs.records[0].getMessage())['size'], 5)
+
+        async def collect(stream):
+            return [chunk async for chunk in stream]
+
+        stream = performance.stream_async(
+            request, HttpResponse(), chunks(),
+            instrumentation.RequestMetrics(), time.perf_counter())
+        with self.assertLogs('librarian.performance') as logs:
+            self.assertEqual(async_to_sync(collect)(stream), [b'ab', b'c'])
+        self.assertEqual(json.loads(logs.records[0].getMessage())['size'], 3)
+
+        session = mock.Mock()
+        session.get.return_value.json.return_value = self.single_book
+        session.get.return_value.status_code = 200
+        metrics = instrumentation.RequestMetrics()
+        patch = mock.patch.object(
+            google_client, 'get_session', return_value=session)
+        with patch, instrumentation.collecting(metrics):
+            helpers.books_google_fetch_volumes(['perf1', 'perf2'])
+        self.assertEqual(metrics.counts['google'], 2)
+        google_cache.get_cache().clear()
+
+    def test_metrics(self):
+        client = Client()
+        client.get('/books_list/')
+        client.get('/books_rest/?order=isbn')
+        helpers.books_filter_ids({'language': 'pl'})
+        helpers.books_bulk_save([Book(title='')])
+        response = client.get('/metrics')
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        content = response.content.decode()
+        self.assertRegex(
+            content, r'librarian_request_duration_seconds_count'
+            r'\{view="books_list"\} [1-9]')
+        self.assertIn(
+            'librarian_request_db_queries_bucket{view="books_list",le="+Inf"}',
+            content)
+        self.assertIn('librarian_cache_hit_ratio{cache="filter"}', content)
+        self.assertRegex(
+            content, r'librarian_requests_total'
+            r'\{view="books_list",status="2xx"\} [1-9]')
+        self.assertRegex(
+            content, r'librarian_requests_total'
+            r'\{view="books_rest",status="4xx"\} [1-9]')
+        self.assertIn('librarian_google_retries_total ', content)
+        self.assertRegex(
+            content, r'librarian_imported_books_total\{result="rejected"\} '
+            r'[1-9]')
+        self.assertRegex(
+            content, r'librarian_db_query_duration_seconds_count [1-9]')
+
+        # Async chain stays async, async view is awaited.
+        async def view(request):
+            return HttpResponse()
+        self.assertTrue(asyncio.iscoroutinefunction(
+            middleware.MetricsMiddleware(view)))
+        response = async_to_sync(AsyncClient().get)(
+            '/books_import_async/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            metrics.registry.expose(),
+            r'librarian_request_duration_seconds_count'
+            r'\{view="books_import_async"\} [1-9]')
+
+        histogram = metrics.Histogram('test_seconds', 'Test.', buckets=(1, 2))
+        for value in (0.5, 1, 1.5, 3):
+            histogram.observe(value)
+        self.assertEqual(
+            [value for name, labels, value in histogram.samples()],
+            [2, 3, 4, 6.0, 4])
+
+    def test_benchmarks(self):
+        books = benchmarks.generate_books(20, seed=3)
+        self.assertEqual(
+            [book.title for book in books],
+            [book.title for book in benchmarks.generate_books(20, seed=3)])
+        self.assertTrue(all(book.set_isbn13() for book in books))
+
+        results = benchmarks.run_benchmarks(
+            count=30, repeat=1, volumes=10,
+            names=['books_filter', 'books_google_parse'])
+        self.assertEqual(results['meta']['books'], 30)
+        self.assertEqual(
+            results['results']['books_google_parse.volumes']['result'], 10)
+        self.assertIn('median', results['results']['books_filter.language'])
+        json.dumps(results)
+
+    @override_settings(LIBRARIAN_GOOGLE_BACKOFF=0)
+    def test_google_client(self):
+        retries = setting('GOOGLE_RETRIES')
+        statuses = [503, 200, 200] + [503] * (retries + 1)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                body = b'{"kind": "books#volumes"}'
+                self.send_response(statuses.pop(0))
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = 'http://127.0.0.1:%d/' % server.server_port
+        before = google_client.pool_stats()
+        try:
+            self.assertEqual(google_client.get(url).status_code, 200)
+            self.assertEqual(google_client.get(url).status_code, 200)
+            stats = google_client.pool_stats()
+            self.assertEqual(google_client.get(url).status_code, 503)
+            failed = google_client.stats()
+        finally:
+            google_client.reset_session()
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(stats['requests'] - before['requests'], 2)
+        self.assertEqual(stats['retries'] - before['retries'], 1)
+        self.assertEqual(stats['pools'][0]['connections'], 1)
+        self.assertEqual(statuses, [])
+        self.assertEqual(failed['retries'] - stats['retries'], retries)
+        self.assertEqual(failed['errors'] - stats['errors'], 1)
+
+    @override_settings(LIBRARIAN_GOOGLE_BACKOFF=0)
+    def test_google_async(self):
+        retries = setting('GOOGLE_RETRIES')
+        statuses = [200, 503, 200] + [503] * (retries + 1)
+
+        def handler(request):
+            if not statuses:
+                raise httpx.ConnectError('refused', request=request)
+            return httpx.Response(statuses.pop(0), json={'kind': 'books'})
+
+        @async_to_sync
+        async def get():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with mock.patch.object(
+                    google_async, 'get_client', return_value=client):
+                try:
+                    return await google_async.get('http://google.test/')
+                finally:
+                    await client.aclose()
+
+        def counted(function):
+            before = google_client.stats()
+            result = function()
+            after = google_client.stats()
+            return result, {
+                name: after[name] - before[name]
+                for name in ('requests', 'retries', 'errors')}
+
+        response, counts = counted(get)
+        self.assertEqual(response.json(), {'kind': 'books'})
+        self.assertEqual(counts, {'requests': 1, 'retries': 0, 'errors': 0})
+        response, counts = counted(get)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(counts['retries'], 1)
+        response, counts = counted(get)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            counts, {'requests': 1, 'retries': retries, 'errors': 1})
+        before = google_client.stats()
+        with self.assertRaises(httpx.ConnectError):
+            get()
+        self.assertEqual(google_client.stats()['errors'] - before['errors'], 1)
+
+    def test_google_cache(self):
+        google_cache.get_cache().clear()
+        self.assertEqual(list(memcache_key_warnings(
+            google_cache.volume_key('bad id\n' * 50))), [])
+        response = mock.Mock()
+        response.json.return_value = dict(
+            self.multiple_books, items=[self.single_book])
+        with mock.patch.object(
+                google_client, 'get', return_value=response) as get:
+            search = {'search': 'Ursa', 'intitle': ''}
+            helpers.books_google_fetch(search_data=search)
+            helpers.books_google_fetch(search_data={'search': ' ursa '})
+            self.assertTrue(helpers.books_google_import({'import1': '12345'}))
+            self.assertEqual(get.call_count, 1)
+        self.assertTrue(Book.objects.filter(title='Ursa Major').exists())
+        google_cache.get_cache().clear()
+
+    def test_bulk_save(self):
+        books = [
+            helpers.books_google_parse(volume)['book']
+            for volume in self.multiple_books['items']]
+        books[1].title = 'x' * 500
+        # Validated column-wise, not record by record.
+        with mock.patch.object(Book, 'clean_fields', side_effect=Exception):
+            results = helpers.books_bulk_save(books, batch_size=2)
+        self.assertEqual(
+            [result['saved'] for result in results], [True, False, False])
+        self.assertIsNotNone(results[1]['error'])
+        self.assertIsNotNone(results[2]['error'])  # broken date
+        self.assertEqual(Book.objects.count(), 5)
+        result = helpers.books_filter(Book.objects.all(), {'title': 'ursa'})
+        self.assertEqual(result.get().title, 'Ursa Major')
+
+    def test_bulk_upsert(self):
+        def dune(isbn, title):
+            return Book(
+                title=title, author='Herbert', publication_date='1965-08-01',
+                isbn=isbn, page_count=412, cover_link='None', language='en')
+
+        helpers.books_bulk_save([dune('0441013597', 'Dune')])
+        self.assertEqual(
+            Book.objects.get(title='Dune').isbn13, '9780441013593')
+        results = helpers.books_bulk_save([
+            dune('9780441013593', 'Dune Messiah'),
+            dune('9780441013593', 'Children of Dune'),
+            dune('0000000000', 'Unknown')])
+        self.assertEqual(
+            [result['saved'] for result in results], [False, True, True])
+        self.assertEqual(Book.objects.count(), 6)
+        self.assertEqual(
+            Book.objects.get(isbn13='9780441013593').title,
+            'Children of Dune')
+        self.assertEqual(
+            Book.objects.get(title='Children of Dune').authors.get().name,
+            'Herbert')
+
+        sql, params = helpers.books_upsert_sql(
+            [dune('0441013597', 'Dune'), dune('9780441013593', 'Dune')])
+        self.assertEqual(sql.count('(%s, %s, %s, %s, %s, %s, %s, %s, %s)'), 2)
+        self.assertEqual(len(params), 18)
+        self.assertIn('ON DUPLICATE KEY UPDATE', sql)
+
+        form = BooksChangeForm(dict(self.examplePost, isbn='0441013597'))
+        self.assertFalse(helpers.books_save_book_form(0, form))
+        self.assertIn('isbn', form.errors)
+
+        # Legacy duplicate without key stays editable.
+        legacy = Book.objects.get(title='Unknown')
+        Book.objects.filter(pk=legacy.pk).update(isbn='0441013597')
+        form = BooksChangeForm(dict(
+            self.examplePost, isbn='0441013597', title='Dune 2'))
+        self.assertTrue(helpers.books_save_book_form(legacy.pk, form))
+        legacy.refresh_from_db()
+        self.assertEqual((legacy.title, legacy.isbn13), ('Dune 2', None))
+        legacy.isbn = '9780441013593'
+        legacy.save()
+        self.assertIsNone(legacy.isbn13)
+
+    def test_find_duplicates(self):
+        books = list(Book.objects.all())
+        books[1].title = "Other"
+        books.append(Book(title="Marry", isbn="9780547951978"))
+        with self.assertNumQueries(1):
+            duplicates = validators.find_duplicates(books)
+        self.assertEqual(duplicates, {0, 2, 3})
+
+    def test_import_books(self):
+        lines = [
+            self.single_book, self.single_minor_broken_book,
+            self.single_major_broken_book, self.single_book]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'books.jsonl')
+            with open(path, 'w') as stream:
+                stream.write('\n'.join(json.dumps(line) for line in lines))
+            out = StringIO()
+            call_command('import_books', path, '--chunk-size', '2', stdout=out)
+            self.assertIn('offset 4: imported 2, duplicates 1, invalid 1',
+                          out.getvalue())
+
+            call_command(
+                'import_books', path, '--offset', '3', stdout=out)
+            self.assertIn('offset 4: imported 0, duplicates 1, invalid 0',
+                          out.getvalue())
+
+            path = os.path.join(directory, 'books.csv')
+            with open(path, 'w') as stream:
+                stream.write(
+                    'title,author,publication_date,isbn,page_count,'
+                    'cover_link,language\n'
+                    'Dune,Herbert,1965-08-01,9780441013593,412,'
+                    'https://books.google.com/books/,en\n')
+            call_command('import_books', path, stdout=out)
+        self.assertEqual(Book.objects.get(title='Dune').page_count, 412)
+        self.assertEqual(Book.objects.count(), 7)
+
+    def test_export_books(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'books.jsonl.gz')
+            err = StringIO()
+            first = Book.objects.order_by('id').first()
+            call_command(
+                'export_books', path, '--since-id', str(first.id),
+                '--chunk-size', '2', stderr=err)
+            self.assertIn('Exported 3 books', err.getvalue())
+
+            path = os.path.join(directory, 'books.csv')
+            call_command(
+                'export_books', path, '--format', 'csv', '--language', 'pl',
+                stderr=err)
+            with open(path) as stream:
+                self.assertEqual(len(stream.readlines()), 2)
+
+            path = os.path.join(directory, 'books.jsonl')
+            call_command('export_books', path, stderr=err)
+            Book.objects.all().delete()
+            call_command('import_books', path, stdout=StringIO())
+        self.assertEqual(Book.objects.count(), 4)
+        self.assertEqual(Book.objects.get(title='John').author, 'Terry')
+
+    def test_conditional_get(self):
+        client = Client()
+        response = client.get('/books_rest/?author=Terry')
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            response = client.get(
+                '/books_rest/?author=Terry', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = client.get(
+            '/books_rest/?author=Wisdom', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        Book.objects.get(title='John').delete()
+        response = client.get(
+            '/books_rest/?author=Terry', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        response = client.get('/books_list/')
+        response = client.get(
+            '/books_list/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_filter_cache(self):
+        filter_cache.clear()
+        before = filter_cache.stats()
+        filters = {'language': 'pl', 'title': ''}
+        self.assertEqual(len(helpers.books_filter_ids(filters)), 1)
+        with self.assertNumQueries(1):  # catalogue version only
+            ids = helpers.books_filter_ids({'language': 'pl'})
+        self.assertEqual(filter_cache.stats()['hits'] - before['hits'], 1)
+
+        page, cursor = helpers.books_paginate_cached({}, limit=3)
+        self.assertEqual(len(page), 3)
+        page, cursor = helpers.books_paginate_cached({}, cursor=cursor)
+        self.assertEqual([book.title for book in page], ['Books'])
+        self.assertIsNone(cursor)
+
+        Book.objects.filter(id__in=ids).delete()
+        self.assertEqual(helpers.books_filter_ids({'language': 'pl'}), [])
+        with self.settings(LIBRARIAN_FILTER_CACHE_MAX_ROWS=2):
+            self.assertIsNone(helpers.books_filter_ids({}))
+
+    def test_books_list_pages(self):
+        client = Client()
+        response = client.get('/books_list/?limit=25&order=-publication_date')
+        self.assertEqual(
+            [book.title for book in response.context['books']],
+            ['John', 'Marry', 'Books', 'Kaliba'])
+        self.assertIsNone(response.context['next_query'])
+        self.assertEqual(response.context['count'], 4)
+
+        with self.settings(LIBRARIAN_LIST_PAGE_SIZE=3):
+            response = client.get('/books_list/?order=title&language=')
+            self.assertEqual(
+                [book.title for book in response.context['books']],
+                ['Books', 'John', 'Kaliba'])
+            self.assertIsNone(response.context['previous_query'])
+            response = client.get(
+                '/books_list/?' + response.context['next_query'])
+            self.assertEqual(
+                [book.title for book in response.context['books']],
+                ['Marry'])
+            self.assertIn('language=', response.context['next_query'] or
+                          response.context['previous_query'])
+            response = client.get(
+                '/books_list/?' + response.context['previous_query'])
+            self.assertEqual(len(response.context['books']), 3)
+            self.assertIsNone(response.context['previous_query'])
+
+        response = client.post('/books_list/', {'author': 'Terry'})
+        self.assertEqual(response.context['books'][0].title, 'John')
+
+        with self.settings(LIBRARIAN_FILTER_CACHE_MAX_ROWS=2):
+            filter_cache.clear()
+            self.assertEqual(helpers.books_count({}), (4, False, False))
+            self.assertEqual(
+                helpers.books_count({}, mode='exact'), (4, True, False))
+            self.assertEqual(
+                helpers.books_count({'publication_from': '1900-01-01'}),
+                (2, False, True))
+            response = client.get('/books_list/?publication_from=1900-01-01')
+            self.assertContains(response, '2+ books')
+            page, cursor = helpers.books_paginate_cached(
+                {}, 'title', limit=2)
+            page, cursor = helpers.books_paginate_cached(
+                {}, 'title', helpers.books_cursor_encode(page[0], 'title'),
+                limit=2, backward=True)
+            self.assertEqual(page, [])
+            self.assertIsNone(cursor)
+
+    def test_books_list_fragments(self):
+        client = Client()
+        response = client.get('/books_list/')
+        self.assertContains(response, 'Marry')
+
+        book = Book.objects.get(title='Marry')
+        Book.objects.filter(id=book.id).update(title='Stale')
+        response = client.get('/books_list/')
+        self.assertContains(response, 'Marry')  # row served from cache
+
+        book = Book.objects.get(id=book.id)
+        book.title = 'Mary'
+        book.save()
+        response = client.get('/books_list/')
+        self.assertContains(response, 'Mary')
+        self.assertNotContains(response, 'Marry')
+
+    def test_autocomplete(self):
+        suggestions.reset()
+        client = Client()
+        response = client.get('/books_autocomplete/?field=author&q=w')
+        self.assertEqual(response.json()['results'], ['Wisdom'])
+
+        book = Book.objects.get(author='Wisdom')
+        book.author = 'Wise'
+        book.save()
+        Book.objects.create(
+            title="Kaliban", author="Wisdom",
+            publication_date="1990-05-20", isbn="9780547951977",
+            page_count=5, cover_link="https://books.google.com/books/",
+            language="en")
+        self.assertEqual(
+            suggestions.lookup('author', 'WI'), ['Wisdom', 'Wise'])
+        self.assertEqual(
+            suggestions.lookup('title', 'kal'), ['Kaliba', 'Kaliban'])
+
+        Book.objects.get(title='Kaliban').delete()
+        self.assertEqual(suggestions.lookup('author', 'wi'), ['Wise'])
+
+        # Names of co-authors are suggested separately.
+        book.author = 'Ann Lee, Wise'
+        book.save()
+        self.assertEqual(suggestions.lookup('author', 'ann'), ['Ann Lee'])
+        self.assertEqual(suggestions.lookup('author', 'wi'), ['Wise'])
+
+        # Expired index is served while rebuilt in background.
+        Book.objects.filter(pk=book.pk).update(title='Kalahari')
+        with self.settings(LIBRARIAN_AUTOCOMPLETE_MAX_AGE=-1):
+            self.assertEqual(
+                suggestions.lookup('title', 'kala'), [])
+            suggestions.refresher.join()
+        self.assertEqual(suggestions.lookup('title', 'kala'), ['Kalahari'])
+        response = client.get('/books_autocomplete/?field=isbn&q=9')
+        self.assertEqual(response.status_code, 400)
+
+    def test_authors(self):
+        books = Book.objects.all()
+        book = Book.objects.get(title='Books')
+        book.author = 'Wisdom, Terry'
+        book.save()
+        self.assertEqual(
+            sorted(author.name for author in book.authors.all()),
+            ['Terry', 'Wisdom'])
+        result = helpers.books_filter(books, {'author': 'Terry'})
+        self.assertEqual(
+            sorted(book.title for book in result), ['Books', 'John'])
+        result = helpers.books_filter(books, {'author': 'Terry, Wisdom'})
+        self.assertEqual(result.get().title, 'Books')
+
+        results = helpers.books_bulk_save([
+            helpers.books_google_parse(self.single_major_broken_book)['book']
+        ] + [Book(
+            title='Sigarius', author='Terry,Milwaukee Art Museum',
+            publication_date='2001-01-01', isbn='9780547951911',
+            page_count=5, cover_link='https://books.google.com/books/',
+            language='en')])
+        self.assertTrue(results[1]['saved'])
+        result = helpers.books_filter(books, {'author': 'Terry'})
+        self.assertEqual(result.count(), 3)
+        self.assertEqual(
+            Author.objects.get(name='Milwaukee Art Museum').books.get().title,
+            'Sigarius')
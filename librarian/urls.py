@@ -7,5 +7,21 @@ urlpatterns = [
     path('books_list/', views.books_list, name='books_list'),
     path('books_manage/', views.books_manage, name='books_manage'),
     path('books_import/', views.books_import, name='books_import'),
-    path('books_rest/', views.books_rest, name='books_rest')
+    path(
+        'books_import_async/', views.books_import_async,
+        name='books_import_async'),
+    path(
+        'books_import/<int:job_id>/status/', views.books_import_status,
+        name='books_import_status'),
+    path('books_rest/', views.books_rest, name='books_rest'),
+    path(
+        'books_autocomplete/', views.books_autocomplete,
+        name='books_autocomplete'),
+    path(
+        'books_google_stats/', views.books_google_stats,
+        name='books_google_stats'),
+    path(
+        'books_cache_stats/', views.books_cache_stats,
+        name='books_cache_stats'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
@@ -1,56 +1,238 @@
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models
+from django.db.models import Q
+import datetime
 import librarian.models
 import re
+from . import isbn as isbn_tools
+
+
+DUPLICATES_CHUNK = 500
+
+LANGUAGE = re.compile('[a-zA-Z]')
+LINK = re.compile('(http).*')
+
+MAJOR = 'major_error'
+MINOR = 'minor_error'
+DUPLICATE = 'duplicate_error'
+
+
+def duplicate_key(isbn, title):
+    ''' Return key equal for books considered duplicates,
+        canonical ISBN-13 is used when isbn is valid.
+    '''
+    return (isbn_tools.canonical(isbn) or isbn, title)
+
+
+def find_duplicates(books):
+    ''' Return set of indexes of books which isbn and title
+        are already in database. ISBN-10 and ISBN-13 forms
+        of the same book are equal. Uses one query per chunk of isbns.
+
+        Keyword argument:
+        books -- List of Book instances
+    '''
+    raw = [book.isbn for book in books]
+    keys = isbn_tools.canonical_many(raw)
+    isbns = list(set(raw))
+    canonical = list({key for key in keys if key})
+    existing = set()
+    for start in range(0, max(len(isbns), len(canonical)), DUPLICATES_CHUNK):
+        end = start + DUPLICATES_CHUNK
+        query = librarian.models.Book.objects.filter(
+            Q(isbn__in=isbns[start:end]) | Q(isbn13__in=canonical[start:end]))
+        existing.update(
+            (isbn13 or isbn, title)
+            for isbn, isbn13, title in query.values_list(
+                'isbn', 'isbn13', 'title'))
+
+    return {
+        index for index, book in enumerate(books)
+        if (keys[index] or book.isbn, book.title) in existing}
 
 
 def check_duplicates(book):
-    query = librarian.models.Book.objects.filter(
-        isbn=book.isbn,
-        title=book.title)
-    if query:
+    if find_duplicates([book]):
         raise ValidationError(
             _('Possible Duplication'),
-            code='duplicate_error')
+            code=DUPLICATE)
 
     return False
 
 
 def check_isbn(isbn):
-    if len(isbn) != 13 and len(isbn) != 10 or re.match('0[10]', isbn):
-        raise ValidationError(_('Wrong ISBN'), code='minor_error')
+    if isbn_tools.canonical(isbn) is None:
+        raise ValidationError(_('Wrong ISBN'), code=MINOR)
     return True
 
 
+# Rules shared by check_* functions and column-wise COLUMN_CHECKS,
+# each returns True for invalid value.
+def author_invalid(author):
+    return author == ''
+
+
+def title_invalid(title):
+    return title == ''
+
+
+def pages_count_invalid(page_count):
+    return page_count == 0
+
+
+def language_invalid(language):
+    return not LANGUAGE.match(language) or len(language) != 2
+
+
+def link_invalid(link):
+    return not LINK.match(link)
+
+
 def check_author(author):
-    if author == '':
-        raise ValidationError(_('Empty Author'), code='minor_error')
+    if author_invalid(author):
+        raise ValidationError(_('Empty Author'), code=MINOR)
     return True
 
 
 def check_title(title):
-    if title == '':
-        raise ValidationError(_('Empty Title'), code='major_error')
+    if title_invalid(title):
+        raise ValidationError(_('Empty Title'), code=MAJOR)
     return True
 
 
 def check_pages_count(page_count):
-    if page_count == 0:
-        raise ValidationError(_('Zero Pages'), code='minor_error')
+    if pages_count_invalid(page_count):
+        raise ValidationError(_('Zero Pages'), code=MINOR)
     return True
 
 
 def check_language(language):
-    if not re.match("[a-zA-Z]", language) or len(language) != 2:
+    if language_invalid(language):
         raise ValidationError(
             _('Language code must be 2 letters'),
-            code='minor_error')
+            code=MINOR)
     return True
 
 
 def check_link(link):
-    if not re.match("(http).*", link):
+    if link_invalid(link):
         raise ValidationError(
             _('Link must start with http'),
-            code='minor_error')
+            code=MINOR)
     return True
+
+
+# Column checks of Book.clean in its order, first failing one sets the code.
+# isbn column is checked with isbn_tools.canonical_many beforehand.
+COLUMN_CHECKS = [
+    ('author', MINOR, author_invalid),
+    ('title', MAJOR, title_invalid),
+    ('page_count', MINOR, pages_count_invalid),
+    ('language', MINOR, language_invalid),
+    ('cover_link', MINOR, link_invalid),
+]
+
+_format_checks = None
+
+
+def format_checks():
+    ''' Return List of (field, predicate) where predicate returns True
+        for values which surely pass field.clean, so it is run only
+        for the remaining ones.
+    '''
+    global _format_checks
+    if _format_checks is not None:
+        return _format_checks
+
+    checks = []
+    for field in librarian.models.Book._meta.fields:
+        if isinstance(field, models.AutoField):
+            predicate = None
+        elif isinstance(field, models.CharField):
+            def predicate(value, field=field):
+                return (
+                    type(value) is str and len(value) <= field.max_length
+                    and (value != '' or field.blank))
+        elif isinstance(field, models.IntegerField):
+            low = min((
+                validator.limit_value for validator in field.validators
+                if isinstance(validator, MinValueValidator)),
+                default=float('-inf'))
+            high = max((
+                validator.limit_value for validator in field.validators
+                if isinstance(validator, MaxValueValidator)),
+                default=float('inf'))
+
+            def predicate(value, low=low, high=high):
+                return type(value) is int and low <= value <= high
+        elif isinstance(field, models.DateTimeField):
+            def predicate(value):
+                return type(value) is datetime.datetime
+        elif isinstance(field, models.DateField):
+            def predicate(value):
+                return type(value) is datetime.date
+        else:
+            def predicate(value):
+                return False
+        if predicate:
+            checks.append((field, predicate))
+    _format_checks = checks
+    return checks
+
+
+def format_errors(books):
+    ''' Return set of indexes of books which fail Book.clean_fields.
+        Values are checked column by column with cheap type and length
+        predicates, field.clean runs only for values they can not accept.
+        Like clean_fields, cleaned values are set back on books.
+
+        Keyword argument:
+        books -- List of Book instances
+    '''
+    errors = set()
+    for field, predicate in format_checks():
+        attname = field.attname
+        column = [getattr(book, attname) for book in books]
+        for index, value in enumerate(column):
+            if index in errors or predicate(value):
+                continue
+            if field.blank and value in field.empty_values:
+                continue
+            if value is None and field.null:
+                continue
+            try:
+                book = books[index]
+                setattr(book, attname, field.clean(value, book))
+            except ValidationError:
+                errors.add(index)
+    return errors
+
+
+def validate_books(books, duplicates=True):
+    ''' Return List of error codes, one per book: 'duplicate_error',
+        'major_error', 'minor_error' or None if book is fine.
+        Codes follow precedence of books duplicate check and Book.clean,
+        but no exception is raised per record.
+
+        Keyword arguments:
+        books -- List of Book instances
+        duplicates -- look for books already stored in database
+    '''
+    codes = [None] * len(books)
+    if duplicates:
+        for index in find_duplicates(books):
+            codes[index] = DUPLICATE
+    for index in format_errors(books):
+        codes[index] = codes[index] or MAJOR
+    keys = isbn_tools.canonical_many(book.isbn for book in books)
+    for index, key in enumerate(keys):
+        if codes[index] is None and key is None:
+            codes[index] = MINOR
+
+    for attname, code, failed in COLUMN_CHECKS:
+        for index, book in enumerate(books):
+            if codes[index] is None and failed(getattr(book, attname)):
+                codes[index] = code
+    return codes
@@ -1,32 +1,89 @@
 from django.shortcuts import render
 from django.http import HttpResponseRedirect
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.http import StreamingHttpResponse, JsonResponse
 from django.urls import reverse
+from django.views.decorators.http import condition
 from django.core import serializers
-from librarian.models import Book
+from asgiref.sync import sync_to_async
+from librarian.models import Book, ImportJob
+from librarian.conf import setting
 
 from . import forms
 from . import helpers
+from . import google_client
+from . import catalogue
+from . import google_cache
+from . import jobs
+from . import metrics
+from .result_cache import filter_cache
+from .autocomplete import suggestions
+
+catalogue_condition = condition(
+    etag_func=catalogue.etag, last_modified_func=catalogue.last_modified)
 
 
 def index(request):
     return render(request, "librarian/index.html")
 
 
+@catalogue_condition
 def books_list(request):
-    books = Book.objects.all()
-    if(request.method == "POST"):
-        form = forms.BooksFilterForm(request.POST)
-        if(form.is_valid()):
-            books = helpers.books_filter(books, form.cleaned_data)
-            print(type(form.cleaned_data['publication_from']))
+    data = request.POST if request.method == "POST" else request.GET
+    form = forms.BooksFilterForm(data)
+    filters = {}
+    page = {
+        'order': 'id', 'limit': setting('LIST_PAGE_SIZE'),
+        'cursor': '', 'before': ''}
+    if(form.is_valid()):
+        filters = page = form.cleaned_data
+
+    version = catalogue.version(request)
+    order = page['order']
+    backward = bool(page['before'])
+    try:
+        books, cursor = helpers.books_paginate_cached(
+            filters, order, page['before'] or page['cursor'],
+            page['limit'], version, backward)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    count, count_exact, count_capped = helpers.books_count(
+        filters, order, version)
+
+    next_cursor = previous_cursor = None
+    if backward:
+        previous_cursor = cursor
+        if books:
+            next_cursor = helpers.books_cursor_encode(books[-1], order)
     else:
-        form = forms.BooksFilterForm()
+        next_cursor = cursor
+        if page['cursor'] and books:
+            previous_cursor = helpers.books_cursor_encode(books[0], order)
 
-    context = {"form": form, "books": books}
+    query = data.copy()
+    for key in ('csrfmiddlewaretoken', 'cursor', 'before'):
+        query.pop(key, None)
+
+    context = {
+        "form": form, "books": books,
+        "count": count, "count_exact": count_exact,
+        "count_capped": count_capped,
+        "next_query": books_list_query(query, 'cursor', next_cursor),
+        "previous_query": books_list_query(
+            query, 'before', previous_cursor),
+        "fragment_timeout": setting('FRAGMENT_CACHE_TIMEOUT'),
+    }
     return render(request, "librarian/books_list.html", context)
 
 
+def books_list_query(query, key, cursor):
+    if not cursor:
+        return None
+    query = query.copy()
+    query[key] = cursor
+    return query.urlencode()
+
+
 def books_manage(request):
     if(request.method == "GET"):
         id = request.GET.get('editid', False)
@@ -45,22 +102,125 @@ def books_import(request):
     books = []
     if(request.method == "POST"):
         form = forms.BooksImportForm(request.POST)
-        books_saved = helpers.books_google_import(request.POST)
+        ids = helpers.books_google_import_selection(request.POST)
+        if ids:
+            job = jobs.jobs_enqueue(ids)
+            return HttpResponseRedirect(
+                reverse("books_import") + "?job=%d" % job.pk)
         if(form.is_valid()):
             data = helpers.books_google_fetch(search_data=form.cleaned_data)
             books = helpers.books_google_parse(data)
             helpers.books_check_compatibility(books)
-        if books_saved:
-            return HttpResponseRedirect(reverse("books_list"))
     else:
         form = forms.BooksImportForm()
 
-    context = {"form": form, "books": books}
+    job = None
+    if request.GET.get("job", "").isdigit():
+        job = ImportJob.objects.filter(pk=request.GET["job"]).first()
+
+    context = {"form": form, "books": books, "job": job}
     return render(request, "librarian/books_import.html", context)
 
 
+async def books_import_async(request):
+    ''' books_import for ASGI deployments, awaits google api instead of
+        blocking worker, so selected volumes are imported within request.
+    '''
+    books = []
+    if(request.method == "POST"):
+        form = forms.BooksImportForm(request.POST)
+        if helpers.books_google_import_selection(request.POST):
+            if await helpers.books_google_import_async(request.POST):
+                return HttpResponseRedirect(reverse("books_list"))
+        elif(form.is_valid()):
+            data = await helpers.books_google_fetch_async(
+                search_data=form.cleaned_data)
+            books = helpers.books_google_parse(data)
+            await sync_to_async(helpers.books_check_compatibility)(books)
+    else:
+        form = forms.BooksImportForm()
+
+    context = {
+        "form": form, "books": books,
+        "import_url": reverse("books_import_async")}
+    return await sync_to_async(render)(
+        request, "librarian/books_import.html", context)
+
+
+def books_import_status(request, job_id):
+    job = ImportJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'error': 'Unknown job'}, status=404)
+    return JsonResponse(jobs.jobs_status(job))
+
+
+@catalogue_condition
 def books_rest(request):
-    books = Book.objects.all()
-    books = helpers.books_filter(books, request.GET)
-    json_data = serializers.serialize('json', books, ensure_ascii=False)
-    return HttpResponse(json_data, content_type="application/json")
+    page_form = forms.BooksPageForm(request.GET)
+    if not page_form.is_valid():
+        return HttpResponseBadRequest(
+            page_form.errors.as_json(), content_type="application/json")
+
+    page = page_form.cleaned_data
+    if page['stream']:
+        books = helpers.books_filter(Book.objects.all(), request.GET)
+        return books_rest_stream(books, page)
+
+    version = catalogue.version(request)
+    try:
+        books, next_cursor = helpers.books_paginate_cached(
+            request.GET, page['order'], page['cursor'], page['limit'],
+            version)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    json_data = serializers.serialize(
+        'json', books, fields=helpers.book_rest_fields, ensure_ascii=False)
+    response = HttpResponse(json_data, content_type="application/json")
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        response['X-Next-Cursor'] = next_cursor
+        response['Link'] = '<%s>; rel="next"' % request.build_absolute_uri(
+            '?' + query.urlencode())
+    return response
+
+
+def books_autocomplete(request):
+    field = request.GET.get('field', '')
+    prefix = request.GET.get('q', '')
+    if field not in ('author', 'title'):
+        return HttpResponseBadRequest('Unknown field')
+    results = []
+    if prefix:
+        results = suggestions.lookup(
+            field, prefix, setting('AUTOCOMPLETE_LIMIT'))
+    return JsonResponse({'results': results})
+
+
+def books_google_stats(request):
+    return JsonResponse(google_client.pool_stats())
+
+
+def books_cache_stats(request):
+    return JsonResponse({
+        'filter': filter_cache.stats(),
+        'google': google_cache.stats(),
+    })
+
+
+def metrics_view(request):
+    return HttpResponse(
+        metrics.registry.expose(),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def books_rest_stream(books, page):
+    try:
+        books = helpers.books_order(books, page['order'], page['cursor'])
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    stream = helpers.books_json_stream(
+        books, setting('REST_STREAM_CHUNK_SIZE'), page['order'])
+    return StreamingHttpResponse(stream, content_type="application/json")